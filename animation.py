@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Parameters that move along an easing curve over wall-clock time.
+#
+# A Ramp is sampled with supervisor.ticks_ms() wherever its value is
+# needed, so a spin-up takes its configured duration however often the
+# loop gets around to sampling it.  The curves are lookup tables built
+# once at import, and sampling is integer-only, so it doesn't allocate.
+import array
+
+from adafruit_ticks import ticks_diff
+
+CURVE_STEPS = 64  # samples per curve, plus one for the end point
+CURVE_SCALE = 4096  # a curve's value at the end point
+
+
+def _curve(function):
+    return array.array('H', [round(function(step / CURVE_STEPS) * CURVE_SCALE) for step in range(CURVE_STEPS + 1)])
+
+
+LINEAR = _curve(lambda t: t)
+EASE_IN = _curve(lambda t: t * t)
+EASE_OUT = _curve(lambda t: 1 - (1 - t) * (1 - t))
+EASE_IN_OUT = _curve(lambda t: t * t * (3 - 2 * t))
+
+
+class Ramp:
+    def __init__(self, value):
+        self.start_value: int = value
+        self.end_value: int = value
+        self.start_ms: int = 0
+        self.duration_ms: int = 0
+        self.curve = LINEAR
+        self.active: bool = False
+
+    def jump(self, value):
+        # Stop where it is and hold value
+        self.end_value = value
+        self.active = False
+
+    def to(self, now, end_value, duration_ms, curve=LINEAR):
+        # Head for end_value from wherever the ramp is now
+        self.start_value = self.value(now)
+        self.end_value = end_value
+        self.start_ms = now
+        self.duration_ms = duration_ms
+        self.curve = curve
+        self.active = duration_ms > 0 and end_value != self.start_value
+
+    def value(self, now):
+        if not self.active:
+            return self.end_value
+        elapsed = ticks_diff(now, self.start_ms)
+        if elapsed >= self.duration_ms:
+            self.active = False
+            return self.end_value
+        if elapsed < 0:
+            elapsed = 0
+        eased = self.curve[elapsed * CURVE_STEPS // self.duration_ms]
+        return self.start_value + (self.end_value - self.start_value) * eased // CURVE_SCALE
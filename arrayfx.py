@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Ring effects computed as whole-array operations, with ulab.
+#
+# CometRing is a drop-in for effects.CyclotronFrames (render() on a color
+# or shape change, frame(head) each step) that draws richer frames:
+#   - a brightness gradient across each cursor, from its head back
+#   - a tail fading out behind it by a fixed ratio per pixel
+#   - sparks that decay over the following frames instead of lasting one
+# The comet is rendered into a float strip, stored twice in a row as in
+# CyclotronFrames, so rotating it is picking a window.  The strip is also
+# kept packed as bytes, so a step without a spark packs nothing.  Sparks
+# sit in a layer of their own, in ring positions; while one is lit, a
+# frame is the lighter of the comet window and the sparks, packed to bytes
+# in one conversion, and the layer decays in place.  All of it is
+# per-array, never per-pixel Python.  Frames are handed out as memoryviews
+# made once, which a strand's buffer takes like any other bytes.
+#
+# CircuitPython builds with ulab provide ulab.numpy; on a computer plain
+# NumPy stands in.  HAVE_ARRAYS is False when neither is there, and the
+# caller falls back to CyclotronFrames.
+try:
+    from ulab import numpy as np
+except ImportError:
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+from effects import color_bytes
+
+HAVE_ARRAYS = np is not None
+
+if HAVE_ARRAYS:
+    FLOAT = np.float32 if hasattr(np, 'float32') else np.float  # ulab's float is single precision
+    BYTE = np.uint8
+
+CURSOR_FALLOFF = 0.5  # a cursor's last pixel is this much dimmer than its head
+_DARK = 1 / 255  # levels below this round to off
+
+
+class CometRing:
+    def __init__(self, size, bpp=3, tail=0.6, spark_decay=0.75):
+        self.size: int = size
+        self.bpp: int = bpp
+        self.tail = tail  # level kept per pixel behind a cursor
+        self.spark_decay = spark_decay  # level a spark keeps each frame
+        self.frame_length: int = size * bpp
+        self.shape = None  # (cursor width, cursors) the levels were built for
+        self.levels = None  # per channel, doubled
+        self.strip = np.zeros(2 * self.frame_length, dtype=FLOAT)
+        self.packed = np.zeros(2 * self.frame_length, dtype=BYTE)
+        # One window per cursor position into each strip, made once since slicing allocates
+        self.windows = [self.strip[start * bpp:start * bpp + self.frame_length] for start in range(size)]
+        self.frames = [memoryview(self.packed[start * bpp:start * bpp + self.frame_length]) for start in range(size)]
+        self.lit = np.zeros(self.frame_length, dtype=BYTE)  # the frame while a spark is lit
+        self.lit_view = memoryview(self.lit)
+        self.sparks = np.zeros(self.frame_length, dtype=FLOAT)
+        self.spark_color = np.zeros(bpp, dtype=FLOAT)
+        self.spark_level = 0.0  # of the brightest spark still lit
+
+    def _levels(self, cursor_width, cursors):
+        # Brightness of each pixel for a cursor ending at the last pixel
+        levels = [0.0] * self.size
+        spacing = self.size // cursors
+        for cursor in range(cursors):
+            head = self.size - 1 - cursor * spacing
+            level = 1.0
+            for offset in range(spacing):
+                if offset < cursor_width:
+                    level = 1.0 - CURSOR_FALLOFF * offset / cursor_width
+                else:
+                    level *= self.tail
+                if level < _DARK:
+                    break
+                pixel = (head - offset) % self.size
+                if level > levels[pixel]:
+                    levels[pixel] = level
+        return np.array([level for level in levels for _ in range(self.bpp)] * 2, dtype=FLOAT)
+
+    def render(self, color, cursor_width, cursors=1):
+        # Rebuild the strip; call at startup and whenever color or shape changes
+        if self.shape != (cursor_width, cursors):
+            self.shape = (cursor_width, cursors)
+            self.levels = self._levels(cursor_width, cursors)
+        channels = np.array(list(color_bytes(color, self.bpp)) * (2 * self.size), dtype=FLOAT)
+        self.strip[:] = self.levels * channels
+        self.packed[:] = np.array(self.strip, dtype=BYTE)
+
+    def set_spark_color(self, color):
+        self.spark_color[:] = np.array(list(color_bytes(color, self.bpp)), dtype=FLOAT)
+
+    def spark(self, pixel):
+        # Light pixel in the spark color; it fades over the next frames
+        start = pixel * self.bpp
+        self.sparks[start:start + self.bpp] = self.spark_color
+        self.spark_level = 1.0
+
+    def frame(self, head):
+        # Pixel values for the ring with the (first) cursor's head at pixel head
+        index = self.size - 1 - head
+        if self.spark_level < _DARK:
+            return self.frames[index]
+        self.lit[:] = np.array(np.maximum(self.windows[index], self.sparks), dtype=BYTE)
+        self.spark_level *= self.spark_decay
+        if self.spark_level < _DARK:
+            self.sparks[:] = 0
+        else:
+            self.sparks *= self.spark_decay
+        return self.lit_view
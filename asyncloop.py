@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# asyncio runtime for main_loop(), selected with runtime="asyncio".
+#
+# Every scheduler job runs as its own cooperative task that sleeps until
+# its next deadline, and inputs get a task of their own polled every
+# sleep_time_secs.  A job that is disabled is done for good (diagnostics
+# after its one run), so its task ends instead of waking to check.  Tasks
+# share one asyncio.Event: anything that may have changed state or pixels
+# sets it, and a commit task wakes, transmits the
+# dirty strands once and clears it.  Tasks woken for the same tick all run
+# before the commit task, so they still share a single transmit.  After
+# each commit, idle(now, wait_ms) is offered the time until the next job.
+import asyncio
+
+import supervisor
+from adafruit_ticks import ticks_diff
+
+
+async def _job_task(job, changed):
+    while job.enabled:
+        now = supervisor.ticks_ms()
+        wait = ticks_diff(job.deadline, now)
+        if wait > 0:
+            await asyncio.sleep_ms(wait)
+            continue
+        job.callback(now)
+        changed.set()
+        job.advance(now)
+
+
+async def _input_task(poll, interval, changed):
+    while True:
+        poll(supervisor.ticks_ms())
+        changed.set()
+        await asyncio.sleep_ms(interval)
+
+
+async def _commit_task(commit, changed, scheduler, idle, poll_interval_ms):
+    while True:
+        await changed.wait()
+        changed.clear()
+        commit()
+        if idle is not None:
+            now = supervisor.ticks_ms()
+            idle(now, scheduler.ms_until_next(now, poll_interval_ms))
+
+
+async def run(scheduler, poll, commit, poll_interval_ms, idle=None):
+    changed = asyncio.Event()
+    tasks = [asyncio.create_task(_input_task(poll, poll_interval_ms, changed)),
+             asyncio.create_task(_commit_task(commit, changed, scheduler, idle, poll_interval_ms))]
+    for job in scheduler.jobs:
+        tasks.append(asyncio.create_task(_job_task(job, changed)))
+    await asyncio.gather(*tasks)
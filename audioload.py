@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# Loop time lost to audio decoding, and a frame-rate governor for while a
+# sound plays.
+#
+# audio.play() of an MP3 decodes in CircuitPython's background tasks, on
+# the same core as the loop: between bytecodes, around NeoPixel transmits
+# and while the loop sleeps.  Each frame is timed from the top of one loop
+# iteration to the top of the next.  Less the sleep it asked for, that is
+# the frame's own work plus whatever the background took: its busy time.
+# Frames are counted as playing or silent, and the difference between the
+# two average busy times is what audio costs each frame.  Frames are timed
+# with supervisor.ticks_ms(), which doesn't allocate; single frames are
+# coarse, but the totals over many frames are not.
+#
+# While a sound plays, the loop being busy for more than busy_percent of
+# the time starves the decoder, so the governor raises the stride: the loop
+# runs its animation jobs stride times less often, which also means stride
+# times fewer frames to transmit.  Under half of busy_percent lowers it
+# again, and it drops back to 1 as soon as the sound ends.  The stride is
+# judged on ADAPT_FRAMES frames at a time, so one slow frame doesn't move
+# it.
+import array
+
+import eventlog
+from adafruit_ticks import ticks_diff
+
+SILENT = 0
+PLAYING = 1
+
+ADAPT_FRAMES = 16
+
+
+class AudioLoad:
+    def __init__(self, audio, event_log, busy_percent, max_stride=4):
+        self.audio = audio
+        self.event_log = event_log
+        self.busy_percent: int = busy_percent  # 0 only measures
+        self.max_stride: int = max_stride
+        self.stride: int = 1
+        self.playing: bool = False
+        self.frame_start = None  # ticks at the top of the current frame
+        self.sleep_ms: int = 0  # asked for by the current frame
+
+        # Playing frames being judged for the next stride change
+        self.window_frames: int = 0
+        self.window_busy_ms: int = 0
+        self.window_ms: int = 0
+
+        # By SILENT and PLAYING, since the last counts()
+        self.frames = array.array('L', [0, 0])
+        self.busy_ms = array.array('L', [0, 0])
+        self.elapsed_ms = array.array('L', [0, 0])
+        self.longest_ms = array.array('L', [0, 0])
+        self.most_stride: int = 1
+
+    def begin(self, now, uptime_ms):
+        # Called at the top of each loop iteration; returns True if the
+        # stride changed, for the caller to apply to its jobs
+        changed = False
+        if self.frame_start is not None:
+            elapsed = ticks_diff(now, self.frame_start)
+            busy = elapsed - self.sleep_ms
+            if busy < 0:
+                busy = 0
+            which = PLAYING if self.playing else SILENT
+            self.frames[which] += 1
+            self.busy_ms[which] += busy
+            self.elapsed_ms[which] += elapsed
+            if busy > self.longest_ms[which]:
+                self.longest_ms[which] = busy
+            if self.playing and self.busy_percent:
+                changed = self.adapt(busy, elapsed, uptime_ms)
+        self.frame_start = now
+        self.sleep_ms = 0
+
+        playing = self.audio.playing
+        if playing != self.playing:
+            self.playing = playing
+            self.window_frames = self.window_busy_ms = self.window_ms = 0
+            if not playing and self.stride != 1:
+                self.set_stride(1, 0, uptime_ms)
+                changed = True
+        return changed
+
+    def sleeping(self, wait_ms):
+        self.sleep_ms = wait_ms
+
+    def adapt(self, busy, elapsed, uptime_ms):
+        self.window_frames += 1
+        self.window_busy_ms += busy
+        self.window_ms += elapsed
+        if self.window_frames < ADAPT_FRAMES:
+            return False
+        percent = self.window_busy_ms * 100 // self.window_ms if self.window_ms else 0
+        self.window_frames = self.window_busy_ms = self.window_ms = 0
+        if percent > self.busy_percent and self.stride < self.max_stride:
+            self.set_stride(self.stride + 1, percent, uptime_ms)
+        elif percent * 2 < self.busy_percent and self.stride > 1:
+            self.set_stride(self.stride - 1, percent, uptime_ms)
+        else:
+            return False
+        return True
+
+    def set_stride(self, stride, percent, uptime_ms):
+        self.stride = stride
+        if stride > self.most_stride:
+            self.most_stride = stride
+        self.event_log.record(uptime_ms, eventlog.AUDIO_STRIDE, stride, percent)
+
+    def counts(self):
+        # (frames, busy ms, elapsed ms, longest busy ms) silent, the same
+        # playing, and the highest stride, since the last call
+        counts = ((self.frames[SILENT], self.busy_ms[SILENT], self.elapsed_ms[SILENT], self.longest_ms[SILENT]),
+                  (self.frames[PLAYING], self.busy_ms[PLAYING], self.elapsed_ms[PLAYING], self.longest_ms[PLAYING]),
+                  self.most_stride)
+        for which in (SILENT, PLAYING):
+            self.frames[which] = self.busy_ms[which] = self.elapsed_ms[which] = self.longest_ms[which] = 0
+        self.most_stride = self.stride
+        return counts
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# Micro-benchmarks of the per-frame code, with committed budgets.
+#
+# Each benchmark calls one piece of the loop many times on CPython against
+# the stand-ins in host/, and measures the time and the transient bytes
+# allocated per call.  The loop's jobs are closures inside main_loop(), so
+# they are captured from a real main_loop() run: the scheduler's add() is
+# wrapped to keep each job, and the run is stopped on the virtual clock once
+# the pack is in the state a benchmark needs.
+#
+# A benchmark over its budget fails the run.  CPython is not the RP2040:
+# the numbers are proxies, good for catching a change that makes a hot path
+# slower or allocate more, not for predicting loops/s on the pack.  Time
+# budgets have headroom for slower machines, and --slack scales them.
+# The comet benchmarks need NumPy, standing in for ulab, and are skipped
+# without it.
+#
+#   make bench
+#   python3 bench.py --only palette --slack 2
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from simulate import REPO_DIR, load_settings, stage_drive  # sets up sys.path for host/
+
+import hostsim  # noqa: E402
+import mpgc  # noqa: E402
+import mptime  # noqa: E402
+from adafruit_ticks import ticks_add  # noqa: E402
+
+# name: (us per call, bytes allocated per call)
+#   Bytes are what tracemalloc sees on CPython, which boxes every int above
+#   256 and every float; code that doesn't allocate on the pack still shows
+#   a few words here.  The budget is what the code needs today, so any new
+#   allocation on these paths fails.
+BUDGETS = {
+    'cyclotron_step': (10.0, 320),
+    'power_meter_step': (20.0, 256),
+    'flash_step': (10.0, 256),
+    'print_stats': (120.0, 1024),
+    'palette_lookup': (1.0, 0),
+    'palette_scale': (6.0, 64),
+    'ramp_value': (4.0, 128),
+    'flash_pattern_code': (2.0, 96),
+    'clamp': (4.0, 64),
+    'format_time': (16.0, 384),
+    'pretty_print_bytes': (8.0, 256),
+    'print_state': (2.0, 0),
+    'state_dispatch': (1.0, 0),
+    'state_event': (2.0, 0),
+    'audio_load': (4.0, 128),
+    'comet_frame': (1.0, 0),
+    'comet_spark_frame': (12.0, 1152),
+}
+
+CALLS = 2000  # per timing round
+ROUNDS = 5  # the fastest round counts, as with timeit
+
+
+class Captured(BaseException):
+    # Raised out of main_loop() once the run reaches the state wanted
+    pass
+
+
+class _Discard:
+    # stdout for print_stats, so the benchmark formats lines but keeps none
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def capture_jobs(protonpack, stop_ms, script):
+    # Run main_loop() until stop_ms on the virtual clock and return its
+    # scheduler's jobs by name
+    import scheduler
+    jobs = {}
+    add = scheduler.Scheduler.add
+
+    def keep_job(self, name, *args, **kwargs):
+        job = add(self, name, *args, **kwargs)
+        jobs[name] = job
+        return job
+
+    def stop_at():
+        if hostsim.now_ms() >= stop_ms:
+            raise Captured()
+
+    random.seed(0)
+    hostsim.reset()
+    hostsim.set_script(script)
+    hostsim.frame_hook = stop_at
+    scheduler.Scheduler.add = keep_job
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            protonpack.main_loop()
+    except Captured:
+        pass
+    finally:
+        scheduler.Scheduler.add = add
+    hostsim.frame_hook = None
+    hostsim.watch_dog = None  # benchmarks move the clock nowhere near real time
+    return jobs
+
+
+def job_call(job, step_ms=None):
+    # Calls job's callback as the scheduler would, a step_ms later each time
+    clock = [hostsim.ticks_ms()]
+    callback = job.callback
+
+    def call():
+        clock[0] = ticks_add(clock[0], step_ms or job.interval)
+        callback(clock[0])
+
+    return call
+
+
+def measure(call):
+    # (us per call, most bytes any one call left allocated or briefly held)
+    call()  # warm up caches and one-time allocations
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            call()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    most = 0
+    tracemalloc.start()
+    for count in range(CALLS // 10 + 1):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        call()
+        if count:  # the first pass grows tracemalloc's own tables
+            most = max(most, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return best / CALLS * 1e6, most
+
+
+def state_machine_calls():
+    # The state machine's own overhead, with handlers and hooks that do nothing
+    from state import EVENT_COUNT, STATE_COUNT, Event, State
+    from statemachine import StateMachine
+
+    def nothing(now):
+        pass
+
+    machine = StateMachine(STATE_COUNT, EVENT_COUNT, State.LOOP_IDLE)
+    machine.add(State.LOOP_IDLE, Event.TRIGGER_PULLED, State.POWER_ON)
+    machine.add(State.POWER_ON, Event.TRIGGER_RELEASED, State.LOOP_IDLE)
+    machine.on_enter(State.POWER_ON, nothing)
+    machine.on_exit(State.POWER_ON, nothing)
+    step = machine.dispatch({State.LOOP_IDLE: nothing, State.POWER_ON: nothing})
+
+    def trigger_edge():
+        # pulled, then released: two transitions per call
+        machine.handle(Event.TRIGGER_PULLED, 0)
+        machine.handle(Event.TRIGGER_RELEASED, 0)
+
+    return lambda: step(0), trigger_edge
+
+
+def audio_load_call():
+    # One frame's accounting while a sound plays, judging the stride every
+    # ADAPT_FRAMES calls
+    from audioload import AudioLoad
+    from audiopwmio import PWMAudioOut
+    from eventlog import EventLog
+
+    audio = PWMAudioOut(None)
+    audio.play(None, loop=True)
+    audio_load = AudioLoad(audio, EventLog(), 50)
+    clock = [hostsim.ticks_ms()]
+
+    def call():
+        clock[0] = ticks_add(clock[0], 7)
+        audio_load.begin(clock[0], 1000)
+        audio_load.sleeping(5)
+
+    return call
+
+
+def comet_calls():
+    # A 60 pixel comet stepping round, without and with a spark lit
+    import arrayfx
+    if not arrayfx.HAVE_ARRAYS:
+        return {}
+    comet = arrayfx.CometRing(60, 3)
+    comet.render(0xff0000, 3)
+    comet.set_spark_color(0xffffff)
+    head = [0]
+
+    def frame():
+        head[0] = (head[0] + 1) % 60
+        return comet.frame(head[0])
+
+    def spark_frame():
+        comet.spark(head[0])
+        return frame()
+
+    return {'comet_frame': frame, 'comet_spark_frame': spark_frame}
+
+
+def benchmarks(settings):
+    # name -> callable, for every entry in BUDGETS
+    import protonpack
+    import report
+    from animation import EASE_IN_OUT, Ramp
+    from effects import FlashPattern
+    from palette import Palette
+
+    hero = settings.get('hero_switch_pin', 'GP9')
+    trigger = settings.get('rotary_encoder_button_pin', 'GP10')
+    idle = capture_jobs(protonpack, 4000, [(0, hero, 1)])
+    firing = capture_jobs(protonpack, 4000, [(0, hero, 1), (3500, trigger, 0)])
+
+    stats_call = job_call(idle['stats'])
+
+    def print_stats():
+        with contextlib.redirect_stdout(_Discard()):
+            stats_call()
+
+    palette = Palette((0xff0000, 0x00ff00, 0x0000ff, 0xffffff), bpp=4, brightness=0.1)
+    colors = palette.colors
+    ramp = Ramp(300)
+    ramp.to(0, 30, 1 << 28, EASE_IN_OUT)  # stays active for the whole run
+    pattern = FlashPattern(len(colors))
+    state_dispatch, state_event = state_machine_calls()
+    return comet_calls() | {
+        'cyclotron_step': job_call(idle['cyclotron']),
+        'power_meter_step': job_call(idle['power_meter']),
+        'flash_step': job_call(firing['flash'], step_ms=7),
+        'print_stats': print_stats,
+        'palette_lookup': lambda: colors[3],
+        'palette_scale': lambda: palette.scale(0xffa500),
+        'ramp_value': lambda: ramp.value(123456),
+        'flash_pattern_code': lambda: pattern.code(123456, 30),
+        'clamp': lambda: protonpack.clamp(25, 0, 19),
+        'format_time': lambda: report.format_time(3723456),
+        'pretty_print_bytes': lambda: report.pretty_print_bytes(123456),
+        'print_state': lambda: report.print_state(protonpack.State.LOOP_IDLE),
+        'state_dispatch': state_dispatch,
+        'state_event': state_event,
+        'audio_load': audio_load_call(),
+    }
+
+
+def run(args):
+    settings = load_settings(os.path.join(REPO_DIR, 'settings.toml'))
+    failures = []
+    with tempfile.TemporaryDirectory(prefix='CIRCUITPY-') as drive_dir:
+        stage_drive(settings, drive_dir)
+        os.chdir(drive_dir)
+        sys.modules['gc'] = mpgc
+        sys.modules['time'] = mptime
+        try:
+            calls = benchmarks(settings)
+        finally:
+            os.chdir(REPO_DIR)
+            sys.modules['gc'] = sys.modules['_host_gc']
+            sys.modules['time'] = sys.modules['_host_time']
+
+        print(f"{'benchmark':<20} {'us/call':>9} {'budget':>8} {'bytes':>7} {'budget':>7}")
+        for name, (time_budget, byte_budget) in BUDGETS.items():
+            if args.only and args.only not in name:
+                continue
+            if name not in calls:
+                print(f"{name:<20} skipped, no NumPy")
+                continue
+            us_per_call, allocated = measure(calls[name])
+            time_budget *= args.slack
+            over = []
+            if us_per_call > time_budget:
+                over.append('time')
+            if allocated > byte_budget:
+                over.append('bytes')
+            verdict = f"  OVER ({', '.join(over)})" if over else ""
+            print(f"{name:<20} {us_per_call:9.3f} {time_budget:8.1f} {allocated:7,} {byte_budget:7,}{verdict}")
+            if over:
+                failures.append(name)
+    if failures:
+        print(f"*** {len(failures)} over budget: {', '.join(failures)}")
+        return 1
+    print("- All within budget")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame code against its budgets")
+    parser.add_argument('--only', help="run only benchmarks whose name contains this")
+    parser.add_argument('--slack', type=float, default=1.0, help="multiply the time budgets, e.g. on a slow machine")
+    sys.exit(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# Settings schema and loader.
+#
+# settings.toml is read once, line by line the way CircuitPython's
+# os.getenv() reads it (later keys win), instead of one os.getenv() scan
+# of the file per setting.  Every value is checked against SCHEMA before
+# any hardware is touched, and all problems are reported together, along
+# with those between settings (cross_check()).  The
+# result is a Settings object read by attribute.  Single settings can be
+# checked later with parse_setting() and written back with save(), for
+# changes made while running (see console.py).
+import board
+
+# Settings file, relative to the root of CIRCUITPY
+SETTINGS_FILE = "settings.toml"
+
+# Value kinds besides int, float, bool and str
+PIN = 'pin'  # a board pin name, e.g. "GP21"
+
+PIXEL_ORDERS = ("RGB", "GRB", "RGBW", "GRBW")
+
+
+def parse_sound_list(text):
+    # "startup=lib/a.mp3,firing=lib/b.wav" -> (('startup', 'lib/a.mp3'), ('firing', 'lib/b.wav'))
+    sounds = []
+    for entry in text.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if '=' not in entry:
+            raise ValueError(f"entry {entry} should look like name=filename")
+        name, filename = entry.split('=', 1)
+        sounds.append((name.strip(), filename.strip()))
+    return tuple(sounds)
+
+
+def parse_segments(text):
+    # "GP28:30,GP26:30:reversed:GRBW" -> ((board.GP28, 30, False, None), (board.GP26, 30, True, 'GRBW'))
+    segments = []
+    for entry in text.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        fields = [field.strip() for field in entry.split(':')]
+        if len(fields) < 2:
+            raise ValueError(f"segment {entry} should look like PIN:COUNT[:reversed][:ORDER]")
+        pin = _parse(PIN, fields[0])
+        count = int(fields[1])
+        if count < 1:
+            raise ValueError(f"segment {entry} needs at least one pixel")
+        reverse = False
+        pixel_order = None
+        for option in fields[2:]:
+            if option == 'reversed':
+                reverse = True
+            elif option in PIXEL_ORDERS:
+                pixel_order = option
+            else:
+                raise ValueError(f"segment {entry}: {option} is not 'reversed' or one of {', '.join(PIXEL_ORDERS)}")
+        segments.append((pin, count, reverse, pixel_order))
+    return tuple(segments)
+
+
+def parse_names(text):
+    # "firing,startup" -> ('firing', 'startup')
+    return tuple(name.strip() for name in text.split(',') if name.strip())
+
+
+def parse_color_list(text):
+    # "ff0000,ffa500" -> (0xff0000, 0xffa500)
+    colors = tuple(int(color.strip().lstrip('#'), 16) for color in text.split(',') if color.strip())
+    if not colors:
+        raise ValueError("needs at least one color")
+    for color in colors:
+        if color > 0xffffff:
+            raise ValueError(f"{color:x} is not an RRGGBB color")
+    return colors
+
+
+def parse_levels(text):
+    # "0.25,0.3,0.15" -> (0.25, 0.3, 0.15)
+    levels = tuple(float(level) for level in text.split(','))
+    if len(levels) != 3:
+        raise ValueError("needs three levels, for red, green and blue")
+    return levels
+
+
+# name, kind, default, minimum, maximum
+#   kind is int, float, bool, str, PIN, a tuple of allowed strings, or a
+#   function that parses the text.  Defaults are written as they would be
+#   in settings.toml and parsed the same way.
+SCHEMA = (
+    ('stat_clock_time_ms', int, "5000", 100, None),
+    ('sleep_time_secs', float, "0.01", 0.001, 0.1),
+    ('audio_out_pin', PIN, "GP21", None, None),
+    ('audio_buffer_bytes', int, "0", 0, 65536),  # MP3 and streamed WAV buffer; 0 for CircuitPython's default
+    ('audio_busy_percent', int, "50", 0, 100),  # most of the time the loop may be busy while a sound plays; 0 to only measure
+    ('audio_max_stride', int, "4", 1, 16),  # slowest the animations run while a sound plays, as 1/stride
+    ('sounds', parse_sound_list, "", None, None),
+    ('sound_preload', parse_names, "", None, None),
+    ('startup_mp3_filename', str, "lib/KJH_PackstartCombo.mp3", None, None),  # used when sounds is empty
+    ('shutdown_mp3_filename', str, "lib/KJH_PackstopCombo.mp3", None, None),
+    ('firing_mp3_filename', str, "lib/KJH_Nutrona3.mp3", None, None),
+    ('neopixel_ring_pin', PIN, "GP28", None, None),
+    ('neopixel_ring_size', int, "60", 1, 1024),
+    ('neopixel_ring_pixel_order', PIXEL_ORDERS, "GRB", None, None),
+    ('neopixel_ring_cursor_size', int, "3", 1, None),
+    ('neopixel_ring_cursor_count', int, "1", 1, None),
+    ('neopixel_ring_brightness', float, "0.05", 0.0, 1.0),
+    ('neopixel_ring_segments', parse_segments, "", None, None),  # replaces pin and size when set
+    ('ring_effect', ('cyclotron', 'comet'), "cyclotron", None, None),  # comet needs ulab; see arrayfx.py
+    ('comet_tail', float, "0.6", 0.0, 0.95),  # brightness kept per pixel down the comet's tail
+    ('spark_decay', float, "0.75", 0.0, 0.95),  # brightness a comet spark keeps each frame
+    ('neopixel_stick_pin', PIN, "GP27", None, None),
+    ('neopixel_stick_size', int, "20", 1, 1024),
+    ('neopixel_stick_pixel_order', PIXEL_ORDERS, "GRBW", None, None),
+    ('neopixel_stick_brightness', float, "0.1", 0.0, 1.0),
+    ('neopixel_stick_segments', parse_segments, "", None, None),
+    ('hero_switch_pin', PIN, "GP9", None, None),
+    ('rotary_encoder_button_pin', PIN, "GP10", None, None),
+    ('rotary_encoder_dt_pin', PIN, "GP11", None, None),
+    ('rotary_encoder_clock_pin', PIN, "GP12", None, None),
+    ('cyclotron_speed', int, "30", 1, 10000),
+    ('cyclotron_starting_speed', int, "300", 1, 10000),
+    ('power_meter_speed', int, "10", 1, 10000),
+    ('power_meter_starting_speed', int, "100", 1, 10000),
+    ('spin_up_ms', int, "3000", 0, 60000),
+    ('spin_down_ms', int, "1500", 0, 60000),
+    ('overheat_ms', int, "10000", 0, 600000),
+    ('watch_dog_timeout_secs', int, "7", 1, None),
+    ('event_log_flush_ms', int, "250", 10, None),
+    ('gc_collect_bytes', int, "4096", 0, None),  # collect in idle time after this much; 0 to leave it to MicroPython
+    ('gc_threshold_bytes', int, "0", 0, None),  # automatic collection backstop; 0 for a quarter of the free heap
+    ('color_list', parse_color_list, "ff0000,ffa500,ffff00,00ff00,0000ff,800080,ffffff", None, None),
+    ('color_levels', parse_levels, "0.25,0.3,0.15", None, None),
+    ('color_gamma', float, "2.5", 0.1, 5.0),
+    ('palette_cache', str, "palette.cache", None, None),  # built by makepalette.py; "" to always compute
+    ('firing_flash_fps', int, "30", 1, 1000),
+    ('loop_timing', bool, "0", None, None),
+    ('boot_diagnostics_delay_ms', int, "2000", 0, None),
+    ('input_trace_file', str, "", None, None),  # record inputs here when set; see inputtrace.py
+    ('crash_log_records', int, "64", 0, 160),  # ring of health records kept in nvm; 0 to turn off
+    ('crash_log_interval_secs', int, "60", 10, 3600),  # how often a record is offered; see crashlog.py
+    ('runtime', ('loop', 'asyncio'), "loop", None, None),
+)
+
+
+class Settings:
+    __slots__ = tuple(entry[0] for entry in SCHEMA)
+
+    def items(self):
+        # (name, value) in schema order
+        for entry in SCHEMA:
+            yield entry[0], getattr(self, entry[0])
+
+
+def _strip_comment(line):
+    # line without a trailing # comment; a # inside a quoted value stays,
+    # as in CircuitPython's own reader
+    quote = None
+    for index, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char == '"' or char == "'":
+            quote = char
+        elif char == '#':
+            return line[:index]
+    return line
+
+
+def read_settings_file(path=SETTINGS_FILE):
+    # {key: text} from a settings.toml; a missing file means all defaults
+    values = {}
+    try:
+        settings_file = open(path)
+    except OSError:
+        return values
+    with settings_file:
+        for line in settings_file:
+            line = _strip_comment(line).strip()
+            if '=' in line:
+                key, value = line.split('=', 1)
+                value = value.strip()
+                if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+                    value = value[1:-1]
+                values[key.strip()] = value
+    return values
+
+
+def _parse(kind, text):
+    if kind is int:
+        return int(text)
+    if kind is float:
+        return float(text)
+    if kind is bool:
+        return int(text) != 0
+    if kind is str:
+        return text
+    if kind == PIN:
+        try:
+            return getattr(board, text)
+        except AttributeError:
+            raise ValueError(f"no pin {text} on this board")
+    if isinstance(kind, tuple):
+        if text not in kind:
+            raise ValueError(f"must be one of {', '.join(kind)}")
+        return text
+    return kind(text)
+
+
+def _check(kind, minimum, maximum, text):
+    value = _parse(kind, text)
+    if minimum is not None and value < minimum:
+        raise ValueError(f"must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"must be at most {maximum}")
+    return value
+
+
+def parse_setting(name, text):
+    # One setting's value from its text, checked as load() would
+    for entry_name, kind, default, minimum, maximum in SCHEMA:
+        if entry_name == name:
+            return _check(kind, minimum, maximum, text)
+    raise ValueError("unknown setting")
+
+
+def ring_size(settings):
+    # Pixels in the cyclotron ring, from its segments or its single strand
+    if settings.neopixel_ring_segments:
+        return sum(segment[1] for segment in settings.neopixel_ring_segments)
+    return settings.neopixel_ring_size
+
+
+def cross_check(settings):
+    # Problems between settings that each parse fine on their own
+    errors = []
+    if settings.neopixel_ring_cursor_count > ring_size(settings):
+        errors.append(f"neopixel_ring_cursor_count=\"{settings.neopixel_ring_cursor_count}\": "
+                      f"must be at most the ring's {ring_size(settings)} pixels")
+    return errors
+
+
+def load(path=SETTINGS_FILE):
+    values = read_settings_file(path)
+    settings = Settings()
+    errors = []
+    for name, kind, default, minimum, maximum in SCHEMA:
+        text = values.pop(name, default)
+        try:
+            value = _check(kind, minimum, maximum, text)
+        except ValueError as error:
+            errors.append(f"{name}=\"{text}\": {error}")
+            continue
+        setattr(settings, name, value)
+    for name in values:
+        if not name.startswith('CIRCUITPY_'):  # the core's own settings
+            errors.append(f"{name}: unknown setting")
+    if not errors:
+        errors = cross_check(settings)
+    if errors:
+        raise ValueError(f"Bad {path}:\n - " + "\n - ".join(errors))
+
+    # Without a segment list, each strand is one segment on its own pin
+    if not settings.neopixel_ring_segments:
+        settings.neopixel_ring_segments = ((settings.neopixel_ring_pin, settings.neopixel_ring_size, False, None),)
+    if not settings.neopixel_stick_segments:
+        settings.neopixel_stick_segments = ((settings.neopixel_stick_pin, settings.neopixel_stick_size, False, None),)
+
+    # The old per-sound keys still work when there is no sounds list
+    if not settings.sounds:
+        settings.sounds = (('startup', settings.startup_mp3_filename),
+                           ('shutdown', settings.shutdown_mp3_filename),
+                           ('firing', settings.firing_mp3_filename))
+    return settings
+
+
+def save(changes, path=SETTINGS_FILE):
+    # Write {name: text} into settings.toml, replacing those keys' lines and
+    # adding any that aren't there.  Raises OSError unless boot.py has made
+    # CIRCUITPY writable by code.
+    try:
+        with open(path) as settings_file:
+            lines = settings_file.readlines()
+    except OSError:
+        lines = []
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    written = set()
+    with open(path, 'w') as settings_file:
+        for line in lines:
+            key = _strip_comment(line).split('=', 1)[0].strip()
+            if key in changes:
+                if key in written:
+                    continue  # later duplicates would override the new value
+                line = f'{key}="{changes[key]}"\n'
+                written.add(key)
+            settings_file.write(line)
+        for key, text in changes.items():
+            if key not in written:
+                settings_file.write(f'{key}="{text}"\n')
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# Settings commands over the serial console, applied without a reload.
+#
+# Saving settings.toml from a computer makes CircuitPython reload and run
+# all of startup again.  Instead, type into the serial console while the
+# pack runs:
+#   get NAME          show a setting
+#   set NAME VALUE    check a new value and apply it
+#   save              write the settings set so far to settings.toml
+#   list              show every setting
+# Values are checked as settings.toml's are (see config.py).  The loop
+# decides which settings it can apply in place; the rest are kept for the
+# next reload, so save them to keep them.
+#
+# A low-priority job calls poll(); when nothing has been typed that costs
+# one serial_bytes_available check.  Characters are collected until a
+# newline, so a command may arrive over several polls.  A line longer than
+# MAX_LINE is dropped whole rather than growing the heap without bound.
+import sys
+
+import supervisor
+
+import config
+
+MAX_LINE = 128  # characters in a command line
+
+
+class Console:
+    def __init__(self, settings, apply):
+        # apply(name, now) puts a changed setting into effect, returning
+        # False if it only takes effect after a reload
+        self.settings = settings
+        self.apply = apply
+        self.line = ""
+        self.overflowed: bool = False  # the line went past MAX_LINE
+        self.changes = {}  # name -> text, set since the last save
+
+    def poll(self, now):
+        available = supervisor.runtime.serial_bytes_available
+        if not available:
+            return
+        for char in sys.stdin.read(available):
+            if char == '\n' or char == '\r':
+                if self.overflowed:
+                    print(f"? longer than {MAX_LINE} characters, ignored")
+                elif self.line.strip():
+                    self.command(self.line.strip(), now)
+                self.line = ""
+                self.overflowed = False
+            elif len(self.line) < MAX_LINE:
+                self.line += char
+            else:
+                self.overflowed = True
+
+    def command(self, line, now):
+        words = line.split(None, 2)
+        verb = words[0].lower()
+        if verb == 'get' and len(words) == 2:
+            self.show(words[1])
+        elif verb == 'set' and len(words) == 3:
+            self.change(words[1], words[2].strip().strip('"'), now)
+        elif verb == 'save' and len(words) == 1:
+            self.save()
+        elif verb == 'list' and len(words) == 1:
+            for name, value in self.settings.items():
+                print(f"{name} = {value}")
+        else:
+            print(f"? {line}: try get NAME, set NAME VALUE, save or list")
+
+    def show(self, name):
+        if name not in config.Settings.__slots__:
+            print(f"? {name}: unknown setting")
+            return
+        print(f"{name} = {getattr(self.settings, name)}")
+
+    def change(self, name, text, now):
+        try:
+            value = config.parse_setting(name, text)
+        except ValueError as error:
+            print(f"? {name}=\"{text}\": {error}")
+            return
+        previous = getattr(self.settings, name)
+        setattr(self.settings, name, value)
+        errors = config.cross_check(self.settings)
+        if errors:
+            setattr(self.settings, name, previous)
+            print(f"? {errors[0]}")
+            return
+        self.changes[name] = text
+        if self.apply(name, now):
+            print(f"{name} = {value}")
+        else:
+            print(f"{name} = {value} after a reload; save to keep it")
+
+    def save(self):
+        if not self.changes:
+            print("nothing to save")
+            return
+        try:
+            config.save(self.changes)
+        except OSError as error:
+            print(f"? can't write {config.SETTINGS_FILE}: {error}")
+            return
+        print(f"saved {', '.join(self.changes)} to {config.SETTINGS_FILE}")
+        self.changes = {}
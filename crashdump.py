@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# Decode the crash log from a dump of the pack's microcontroller.nvm.
+#
+# The dump can be the raw bytes, or the hex text the REPL prints for
+#   microcontroller.nvm.hex()
+# copied into a file.  Records are listed oldest first, one boot at a
+# time, each boot with the reset that started it.  The reset that ended a
+# boot is the one the next boot started after.  See crashlog.py for what
+# each record holds.
+#
+#   python3 crashdump.py nvm.bin
+#   python3 crashdump.py --last 5 nvm.hex
+import argparse
+import binascii
+import sys
+
+import crashlog
+from report import describe_crash_record, reset_reason_name
+
+
+def read_dump(path):
+    with open(path, 'rb') as dump_file:
+        data = dump_file.read()
+    text = data.strip()
+    if text[:2] in (b"b'", b'b"'):
+        text = text[2:-1]  # pasted as a bytes literal
+    try:
+        return binascii.unhexlify(text)
+    except (binascii.Error, ValueError):
+        return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode the crash log in a dump of microcontroller.nvm")
+    parser.add_argument('dump', help="raw or hex dump of microcontroller.nvm")
+    parser.add_argument('--last', type=int, default=0, help="show only this many of the newest records")
+    args = parser.parse_args()
+
+    try:
+        capacity, records = crashlog.decode(read_dump(args.dump))
+    except ValueError as error:
+        sys.exit(f"{args.dump}: {error}")
+    boots = len(set(record[1] for record in records))
+    print(f"{len(records)} of {capacity} records from {boots} boots")
+    if args.last:
+        records = records[-args.last:]
+    boot = None
+    for record in records:
+        if record[1] != boot:
+            boot = record[1]
+            print(f"- boot {boot}, after a {reset_reason_name(record[4])} reset")
+        print(f"   {describe_crash_record(record)}")
+
+
+if __name__ == '__main__':
+    main()
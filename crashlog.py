@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Post-mortem health log, kept in microcontroller.nvm across resets.
+#
+# The watch dog resets a stalled pack, and the serial console is rarely
+# attached when it happens.  So every so often the loop writes one
+# fixed-width record into a ring in nvm, including:
+#   - uptime and state
+#   - loops/s and the worst gap between input polls since the last record
+#   - the least free heap since the last record
+#   - the last event that wasn't routine bookkeeping
+# After a reset, the newest records of the previous boot are what it was
+# doing, and this boot's reset reason says how it ended.
+#
+# nvm is flash: every write erases and reprograms a whole sector, stalling
+# the core for the duration and wearing the flash.  So a write changes one
+# record with one slice assignment.  Each record has a sequence number, and
+# the newest one is found when the log is first used, so there is no head
+# pointer to update.  The loop only offers records every interval, and a
+# record that says nothing new is only written every HEARTBEAT_INTERVALS
+# offers, unless the loop stalled.  Deciding when writing is quiet enough
+# is left to the caller.
+#
+# decode() reads a log back from nvm or from a dump of it; crashdump.py
+# does that on a computer.
+import struct
+
+MAGIC = b'PPCL'
+VERSION = 1
+HEADER = '<4sBBH'  # magic, version, record size, capacity
+# sequence number (0 in an empty slot), boot number, uptime s, state,
+# reset reason, loops/s, least free heap, worst ms between polls, last
+# event code and its first arg
+RECORD = '<IHIBBHIHBi'
+HEADER_SIZE = struct.calcsize(HEADER)
+RECORD_SIZE = struct.calcsize(RECORD)
+
+# Unchanged records are written every this many offers
+HEARTBEAT_INTERVALS = 10
+# A gap between polls this long is always written
+STALL_MS = 250
+
+RESET_REASONS = ('?', 'POWER_ON', 'BROWNOUT', 'SOFTWARE', 'DEEP_SLEEP_ALARM', 'RESET_PIN', 'WATCHDOG',
+                 'UNKNOWN', 'RESCUE_DEBUG')
+
+
+def reset_reason_code(reason):
+    # microcontroller.ResetReason.WATCHDOG -> 6
+    name = str(reason).split('.')[-1]
+    return RESET_REASONS.index(name) if name in RESET_REASONS else 0
+
+
+def decode(data):
+    # (capacity, [record tuple, ...] oldest first) from a log's bytes; raises
+    # ValueError if they don't start with a log in this format
+    if len(data) < HEADER_SIZE:
+        raise ValueError("too short to hold a crash log")
+    magic, version, record_size, capacity = struct.unpack_from(HEADER, data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"not a version {VERSION} crash log")
+    if len(data) < HEADER_SIZE + capacity * RECORD_SIZE:
+        raise ValueError(f"cut short: {capacity} records need {HEADER_SIZE + capacity * RECORD_SIZE} bytes")
+    records = []
+    for slot in range(capacity):
+        record = struct.unpack_from(RECORD, data, HEADER_SIZE + slot * RECORD_SIZE)
+        if record[0]:
+            records.append(record)
+    records.sort(key=lambda record: record[0])
+    return capacity, records
+
+
+class CrashLog:
+    def __init__(self, nvm, capacity, reset_reason):
+        self.nvm = nvm
+        self.capacity: int = min(capacity, (len(nvm) - HEADER_SIZE) // RECORD_SIZE)
+        self.size: int = HEADER_SIZE + self.capacity * RECORD_SIZE
+        self.reset_reason: int = reset_reason_code(reset_reason)
+        # The log as earlier boots left it, decoded when first needed
+        self.snapshot = bytes(nvm[0:self.size])
+        self.record = bytearray(RECORD_SIZE)
+        self.seq = None  # of the newest record
+        self.boot: int = 0
+        self.last = None  # (state, event code, event arg) last written
+        self.unchanged: int = 0  # offers not written since the last write
+        self.written: int = 0
+
+    def previous(self):
+        # The records earlier boots left, oldest first.  The first call
+        # also picks up numbering after them, or formats the log if nvm
+        # doesn't hold one in this shape.
+        try:
+            capacity, records = decode(self.snapshot)
+            if capacity != self.capacity:
+                raise ValueError("resized")
+        except ValueError:
+            records = []
+        if self.seq is None:
+            if not records:
+                self.nvm[0:self.size] = struct.pack(HEADER, MAGIC, VERSION, RECORD_SIZE, self.capacity) + \
+                    bytes(self.capacity * RECORD_SIZE)
+            self.seq = records[-1][0] if records else 0
+            self.boot = (records[-1][1] + 1) & 0xffff if records else 1
+        return records
+
+    def offer(self, uptime_s, state, loops_per_s, min_free, worst_frame_ms, event_code, event_arg):
+        # Write a record if it says something new, the loop stalled, or
+        # it's time for a heartbeat; returns True if it wrote
+        if self.seq is None:
+            self.previous()
+        last = self.last
+        if (last is not None and last[0] == state and last[1] == event_code and last[2] == event_arg
+                and worst_frame_ms < STALL_MS and self.unchanged < HEARTBEAT_INTERVALS - 1):
+            self.unchanged += 1
+            return False
+        self.seq += 1
+        struct.pack_into(RECORD, self.record, 0, self.seq, self.boot, uptime_s, state, self.reset_reason,
+                         min(loops_per_s, 0xffff), max(min_free, 0), min(worst_frame_ms, 0xffff),
+                         event_code, event_arg)
+        offset = HEADER_SIZE + (self.seq - 1) % self.capacity * RECORD_SIZE
+        self.nvm[offset:offset + RECORD_SIZE] = self.record  # one sector write
+        self.last = (state, event_code, event_arg)
+        self.unchanged = 0
+        self.written += 1
+        return True
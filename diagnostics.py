@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# The startup report: board, what the crash log says about the last boot,
+# settings, wiring, sounds, memory and the boot profile.
+#
+# It prints once, a little after the loop starts, so main_loop() imports
+# this module only then; nothing here is loaded or compiled at boot.
+import gc
+import os
+import sys
+
+import microcontroller
+import neopixel
+import config
+from config import Settings
+from report import describe_crash_record, pretty_print_bytes, reset_reason_name
+
+
+def print_cpu_id():
+    # Convert UID bytearray to a hex string and print it
+    uid_hex = ':'.join(['{:02x}'.format(x) for x in microcontroller.cpu.uid])
+    print(f" - cpu uid: {uid_hex}")
+
+
+def print_crash_log(crash_log, shown=3):
+    # How the last boot ended, and its newest records
+    records = crash_log.previous()
+    boots = len(set(record[1] for record in records))
+    print(f" -- crash log: {len(records)} of {crash_log.capacity} records from {boots} earlier boots, "
+          f"this is boot {crash_log.boot}")
+    if not records:
+        return
+    last_boot = records[-1][1]
+    print(f"   - boot {last_boot} ended in a {reset_reason_name(crash_log.reset_reason)} reset, last recorded:")
+    for record in [record for record in records if record[1] == last_boot][-shown:]:
+        print(f"     {describe_crash_record(record)}")
+
+
+def print_diagnostics(settings, base_colors, palette_cached, sound_bank, memory, loop_start_free, input_trace,
+                      crash_log, boot):
+    print(f" - uname: {os.uname()}")
+    print_cpu_id()
+    print(f" -- freq: {microcontroller.cpu.frequency / 1e6} MHz")
+    print(f" -- reset reason: {microcontroller.cpu.reset_reason}")
+    print(f" -- nvm: {pretty_print_bytes(len(microcontroller.nvm))}")
+    if crash_log is not None:
+        print_crash_log(crash_log)
+    print(f" - python v{sys.version}")
+    print(f" - Loaded {len(Settings.__slots__)} settings from {config.SETTINGS_FILE}")
+    for name, value in settings.items():
+        print(f"    - {name} = {value}")
+    print(f" - neopixel v{neopixel.__version__}")
+    for name, segments in (('ring', settings.neopixel_ring_segments),
+                           ('stick', settings.neopixel_stick_segments)):
+        for pin, count, reverse, pixel_order in segments:
+            print(f"   - NeoPixel {name} segment of {count} on {pin}"
+                  f"{' reversed' if reverse else ''}{' ' + pixel_order if pixel_order else ''}")
+    print(f"   - {len(base_colors)} palette colors {'read from' if palette_cached else 'computed for'} "
+          f"{settings.palette_cache or 'no cache'}")
+    print(f"   - Input select on {settings.hero_switch_pin}")
+    print(" - Rotary encoder:")
+    print(f"   - button on {settings.rotary_encoder_button_pin}")
+    print(f"   -  clock on {settings.rotary_encoder_clock_pin}")
+    print(f"   -     dt on {settings.rotary_encoder_dt_pin}")
+    if input_trace is not None:
+        print(f"   - Recording inputs to {settings.input_trace_file}")
+    print(f" - Audio out on {settings.audio_out_pin}")
+    for sound in sound_bank.numbered:
+        how = "preloaded" if sound.preloaded else "streamed"
+        print(f"   - Sound {sound.number} {sound.name}: {sound.filename} ({how})")
+    print(f"   - Sound bank uses {pretty_print_bytes(sound_bank.memory_used)}")
+    print(f" - Free memory: {pretty_print_bytes(gc.mem_free())} now, "
+          f"{pretty_print_bytes(loop_start_free)} at loop start")
+    if memory.collect_bytes:
+        print(f"   - Collecting in idle time every {pretty_print_bytes(memory.collect_bytes)} allocated")
+    if memory.threshold_bytes:
+        print(f"   - Automatic collection after {pretty_print_bytes(memory.threshold_bytes)}")
+    else:
+        print("   - No automatic collection backstop: this build has no gc.threshold()")
+    print(f" - Boot profile, first pixel at {boot.elapsed_ms('first_pixel'):.1f}ms:")
+    print(boot.report())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Precomputed pixel effects, blitted into a strand with one slice assignment.
+#
+# NeoPixel slice assignment accepts a flat run of per-channel values in
+# R, G, B(, W) order, so a whole strand can be written from a memoryview
+# without touching individual pixels from Python.
+
+
+class _SliceMaker:
+    def __getitem__(self, index):
+        return index
+
+
+# A reusable [:] for strand writes; spelling "[:]" in the loop builds a new
+# slice object on the heap every time
+WHOLE_STRAND = _SliceMaker()[:]
+
+
+def color_bytes(color, bpp):
+    # Split a packed 0xRRGGBB int or an (r, g, b[, w]) tuple into bpp channels
+    if isinstance(color, int):
+        channels = ((color >> 16) & 0xff, (color >> 8) & 0xff, color & 0xff, 0)
+    else:
+        channels = tuple(color) + (0,) * (4 - len(color))
+    return bytes(channels[:bpp])
+
+
+class CyclotronFrames:
+    # Every cursor position of the cyclotron ring.
+    #
+    # The ring pattern for a cursor ending at the last pixel is stored twice
+    # in a row, so the frame for any cursor position is one contiguous
+    # window of the doubled strip.  Rendering a step costs the same no
+    # matter how wide the cursor is or how many cursors there are.
+    def __init__(self, size, bpp=3):
+        self.size: int = size
+        self.bpp: int = bpp
+        self.frame_length: int = size * bpp
+        self.strip = bytearray(2 * self.frame_length)
+        # One window per cursor position, made once since slicing allocates
+        view = memoryview(self.strip)
+        self.frames = [view[start * bpp:start * bpp + self.frame_length] for start in range(size)]
+
+    def render(self, color, cursor_width, cursors=1):
+        # Rebuild the strip; call at startup and whenever color or shape changes
+        lit = color_bytes(color, self.bpp)
+        pattern = bytearray(self.frame_length)
+        spacing = self.size // cursors
+        for cursor in range(cursors):
+            head = self.size - 1 - cursor * spacing
+            for offset in range(min(cursor_width, spacing)):
+                start = ((head - offset) % self.size) * self.bpp
+                pattern[start:start + self.bpp] = lit
+        self.strip[:self.frame_length] = pattern
+        self.strip[self.frame_length:] = pattern
+
+    def frame(self, head):
+        # Pixel values for the ring with the (first) cursor's head at pixel head
+        return self.frames[self.size - 1 - head]
+
+
+# Flash codes in a FlashPattern
+FLASH_OFF = 0
+FLASH_COLOR = 1  # the cyclotron's current color
+FLASH_WHITE = 2
+FLASH_RANDOM = 3  # FLASH_RANDOM + n is color_list[n]
+
+
+class FlashPattern:
+    # A fixed pseudo-random flash sequence for the firing effect.
+    #
+    # The sequence is generated once into a bytearray of flash codes with
+    # the same odds the per-loop random.randrange() flashing used (3 in 20
+    # the current color, 1 in 20 white, 1 in 20 a random color, otherwise
+    # off).  Playback picks the step from elapsed time, so the effect runs
+    # at the same rate however fast the loop spins.
+    def __init__(self, colors, length=64, seed=0x2f6e2b1):
+        self.steps = bytearray(length)
+        state = seed
+        for step in range(length):
+            # xorshift32, so the table is the same on every boot and host
+            state ^= (state << 13) & 0xffffffff
+            state ^= state >> 17
+            state ^= (state << 5) & 0xffffffff
+            roll = state % 20
+            if roll < 3:
+                self.steps[step] = FLASH_COLOR
+            elif roll == 4:
+                self.steps[step] = FLASH_WHITE
+            elif roll == 5:
+                self.steps[step] = FLASH_RANDOM + (state >> 8) % colors
+        self.length: int = length
+
+    def code(self, elapsed_ms, fps):
+        # Flash code to show elapsed_ms after the effect started
+        return self.steps[elapsed_ms * fps // 1000 % self.length]
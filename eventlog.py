@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Preallocated ring buffer of loop events.
+#
+# The main loop records fixed-width numeric records (time, code, two int
+# args) instead of formatting strings, so recording never allocates.
+# Turning records into text happens later, in a low-priority flush.
+import array
+
+# Event codes
+HERO_FELL = 1
+HERO_ROSE = 2
+TRIGGER_FELL = 3
+TRIGGER_ROSE = 4
+COLOR_CHANGED = 5  # args: color index, encoder position
+SOUND_PLAYED = 6  # args: sound number, ms from input edge to playback start
+WATCH_DOG_FED = 7  # args: timeout secs
+BAD_STATE = 8  # args: state
+TRIGGER_LATENCY = 9  # args: ms from trigger edge to first ring commit
+GC_COLLECTED = 10  # args: us taken, bytes reclaimed
+GC_AUTOMATIC = 11  # args: bytes reclaimed by a collection MicroPython ran itself
+AUDIO_STRIDE = 12  # args: new stride, % of the time the loop was busy (0 when the sound ended)
+
+_FIELDS = 4  # time, code, arg1, arg2
+
+
+class EventLog:
+    def __init__(self, capacity=32):
+        self.capacity: int = capacity
+        self.records = array.array('l', [0] * (_FIELDS * capacity))
+        self.head: int = 0  # next slot to write
+        self.count: int = 0  # records waiting to be flushed
+        self.dropped: int = 0  # records overwritten before they were flushed
+
+    def record(self, now, code, arg1=0, arg2=0):
+        records = self.records
+        slot = self.head * _FIELDS
+        records[slot] = now
+        records[slot + 1] = code
+        records[slot + 2] = arg1
+        records[slot + 3] = arg2
+        self.head += 1
+        if self.head == self.capacity:
+            self.head = 0
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.dropped += 1
+
+    def latest(self, skip=()):
+        # (code, arg1) of the newest event, flushed or not, whose code isn't
+        # in skip; (0, 0) if there is none
+        records = self.records
+        for back in range(1, self.capacity + 1):
+            slot = (self.head - back) % self.capacity * _FIELDS
+            code = records[slot + 1]
+            if not code:
+                break  # never written
+            if code not in skip:
+                return code, records[slot + 2]
+        return 0, 0
+
+    def pending(self):
+        # Yield (time, code, arg1, arg2) oldest first, emptying the log
+        records = self.records
+        while self.count:
+            slot = (self.head - self.count) % self.capacity * _FIELDS
+            self.count -= 1
+            yield records[slot], records[slot + 1], records[slot + 2], records[slot + 3]
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Garbage collection in the loop's idle time.
+#
+# Left alone, MicroPython collects when an allocation finds no room (or
+# passes gc.threshold()), which can land in the middle of a frame and
+# stall the cyclotron for a whole mark and sweep.  The MemoryManager
+# collects instead just before the loop sleeps, once collect_bytes have
+# been allocated since the last collection and the sleep is at least as
+# long as the last collection took.  Collecting little and often keeps
+# each collection short.  gc.threshold() is set well above collect_bytes,
+# as a backstop for a loop that never has the time.  Builds compiled
+# without the allocation threshold have no gc.threshold(), and then no
+# backstop.
+#
+# Every collection's duration and bytes reclaimed go to the event log.
+# Automatic collections can't be timed, but are seen as heap use dropping
+# between two idles by at least half of what was allocated since the last
+# collection, and logged with what they reclaimed.  Smaller drops are
+# blocks given back by a shrinking realloc.
+import gc
+import time
+
+import eventlog
+
+
+class MemoryManager:
+    def __init__(self, event_log, collect_bytes, threshold_bytes=0):
+        # collect_bytes=0 leaves collection to MicroPython; threshold_bytes=0
+        # picks a quarter of the free heap.  threshold_bytes is left 0 when
+        # the build has no gc.threshold().
+        self.event_log = event_log
+        self.collect_bytes: int = collect_bytes
+        gc.collect()
+        if not threshold_bytes:
+            threshold_bytes = max(gc.mem_free() // 4, collect_bytes * 2)
+        self.threshold_bytes: int = 0
+        if hasattr(gc, 'threshold'):
+            self.threshold_bytes = threshold_bytes
+            gc.threshold(threshold_bytes)
+        self.after_collect: int = gc.mem_alloc()  # heap in use after the last collection
+        self.last_in_use: int = self.after_collect
+        self.cost_ms: int = 1  # idle time a collection needs, going by the last one
+        self.most_in_use: int = self.after_collect  # heap high-water mark since the last peak_in_use()
+
+        # Since the last counts()
+        self.allocated: int = 0
+        self.collections: int = 0
+        self.automatic: int = 0
+        self.reclaimed: int = 0
+        self.longest_us: int = 0
+
+    def idle(self, now, wait_ms):
+        # Called as the loop is about to sleep for wait_ms; returns True if
+        # it collected, so the caller can work out the sleep again
+        in_use = gc.mem_alloc()
+        if in_use < self.last_in_use:
+            reclaimed = self.last_in_use - in_use
+            if reclaimed * 2 >= self.last_in_use - self.after_collect:
+                # MicroPython ran a collection itself
+                self.automatic += 1
+                self.reclaimed += reclaimed
+                self.after_collect = in_use
+                self.event_log.record(now, eventlog.GC_AUTOMATIC, reclaimed)
+        else:
+            self.allocated += in_use - self.last_in_use
+            if in_use > self.most_in_use:
+                self.most_in_use = in_use
+        self.last_in_use = in_use
+        if self.collect_bytes and in_use - self.after_collect >= self.collect_bytes and wait_ms >= self.cost_ms:
+            self.collect(now)
+            return True
+        return False
+
+    def collect(self, now):
+        before = gc.mem_alloc()
+        start_ns = time.monotonic_ns()
+        gc.collect()
+        duration_us = (time.monotonic_ns() - start_ns) // 1000
+        in_use = gc.mem_alloc()
+        self.collections += 1
+        self.reclaimed += before - in_use
+        if duration_us > self.longest_us:
+            self.longest_us = duration_us
+        self.cost_ms = duration_us // 1000 + 1
+        self.after_collect = self.last_in_use = in_use
+        self.event_log.record(now, eventlog.GC_COLLECTED, duration_us, before - in_use)
+
+    def peak_in_use(self):
+        # Most heap in use at any idle since the last call
+        peak = self.most_in_use
+        self.most_in_use = self.last_in_use
+        return peak
+
+    def counts(self):
+        # (bytes allocated, collections, automatic collections, bytes
+        # reclaimed, longest collection in us) since the last call
+        counts = (self.allocated, self.collections, self.automatic, self.reclaimed, self.longest_us)
+        self.allocated = self.collections = self.automatic = self.reclaimed = self.longest_us = 0
+        return counts
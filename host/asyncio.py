@@ -0,0 +1,113 @@
+# Stand-in for CircuitPython's asyncio library, on the hostsim virtual clock.
+#
+# CPython's own asyncio runs on the real clock and can't be driven by the
+# stand-ins, so this is a small cooperative scheduler with just the parts
+# protonpack uses: run, create_task, gather, sleep, sleep_ms and Event.
+# Whenever every task is waiting, it sleeps the virtual clock until the
+# next wake-up, which the harness counts as one loop.
+import heapq
+from collections import deque
+
+import hostsim
+
+
+class _Request:
+    def __init__(self, kind, value):
+        self.kind = kind
+        self.value = value
+
+    def __await__(self):
+        return (yield self)
+
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.done = False
+        self.result = None
+        self.joiners = []
+
+    def __await__(self):
+        if not self.done:
+            yield _Request('join', self)
+        return self.result
+
+
+class Event:
+    def __init__(self):
+        self.state = False
+        self.waiters = []
+
+    def is_set(self):
+        return self.state
+
+    def set(self):
+        self.state = True
+        for task in self.waiters:
+            _ready.append(task)
+        self.waiters = []
+
+    def clear(self):
+        self.state = False
+
+    async def wait(self):
+        if not self.state:
+            await _Request('wait', self)
+        return True
+
+
+_ready = deque()
+_sleeping = []
+_sequence = 0
+
+
+def _step(task):
+    global _sequence
+    try:
+        request = task.coro.send(None)
+    except StopIteration as stop:
+        task.done = True
+        task.result = stop.value
+        _ready.extend(task.joiners)
+        return
+    if request.kind == 'sleep':
+        _sequence += 1
+        heapq.heappush(_sleeping, (request.value, _sequence, task))
+    elif request.kind == 'wait':
+        request.value.waiters.append(task)
+    elif request.kind == 'join':
+        request.value.joiners.append(task)
+
+
+def create_task(coro):
+    task = Task(coro)
+    _ready.append(task)
+    return task
+
+
+def sleep_ms(ms):
+    return _Request('sleep', hostsim.clock_us + int(ms * 1000))
+
+
+def sleep(seconds):
+    return _Request('sleep', hostsim.clock_us + int(seconds * 1_000_000))
+
+
+async def gather(*tasks):
+    return [await task for task in tasks]
+
+
+def run(coro):
+    main = create_task(coro)
+    while not main.done:
+        while _ready:
+            _step(_ready.popleft())
+        if main.done:
+            break
+        if not _sleeping:
+            raise RuntimeError("all tasks are waiting and none are sleeping")
+        wake_us = _sleeping[0][0]
+        hostsim.sleep((wake_us - hostsim.clock_us) / 1_000_000)
+        while _sleeping and _sleeping[0][0] <= hostsim.clock_us:
+            _ready.append(heapq.heappop(_sleeping)[2])
+    return main.result
@@ -0,0 +1,27 @@
+# Stand-in for the CircuitPython "audiocore" module.  Nothing is played;
+# each sample just lasts hostsim.sound_duration_ms when played.
+
+
+class RawSample:
+    def __init__(self, buffer, *, channel_count=1, sample_rate=8000, single_buffer=True):
+        self.buffer = buffer
+        self.channel_count = channel_count
+        self.sample_rate = sample_rate
+        self.bits_per_sample = 8 * buffer.itemsize if hasattr(buffer, 'itemsize') else 8
+
+    def deinit(self):
+        self.buffer = None
+
+
+class WaveFile:
+    def __init__(self, file, buffer=None):
+        if isinstance(file, str):
+            file = open(file, 'rb')
+        self.file = file
+        self.buffer = buffer
+        self.sample_rate = 22050
+        self.bits_per_sample = 16
+        self.channel_count = 1
+
+    def deinit(self):
+        self.file = None
@@ -0,0 +1,26 @@
+# Stand-in for the CircuitPython "audiomp3" module.  Nothing is decoded;
+# each sample just lasts hostsim.sound_duration_ms when played.
+
+
+class MP3Decoder:
+    def __init__(self, file, buffer=None):
+        if isinstance(file, str):
+            file = open(file, 'rb')
+        self._file = file
+        self.buffer = buffer
+        self.sample_rate = 44100
+        self.bits_per_sample = 16
+        self.channel_count = 2
+        self.rms_level = 0.0
+        self.samples_decoded = 0
+
+    @property
+    def file(self):
+        return self._file
+
+    @file.setter
+    def file(self, file):
+        self._file = file
+
+    def deinit(self):
+        self._file = None
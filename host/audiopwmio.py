@@ -0,0 +1,39 @@
+# Stand-in for the CircuitPython "audiopwmio" module
+import hostsim
+
+
+class PWMAudioOut:
+    def __init__(self, left_channel, right_channel=None, quiescent_value=0x8000):
+        self.left_channel = left_channel
+        self.right_channel = right_channel
+        self._sample = None
+        self._stop_us = 0
+        self._loop = False
+        self.paused = False
+        self.plays = 0
+        hostsim.audio_outputs.append(self)
+
+    @property
+    def playing(self):
+        if self._sample is None:
+            return False
+        return self._loop or hostsim.clock_us < self._stop_us
+
+    def play(self, sample, loop=False):
+        self._sample = sample
+        self._loop = loop
+        self._stop_us = hostsim.clock_us + hostsim.sound_duration_ms * 1000
+        self.paused = False
+        self.plays += 1
+
+    def stop(self):
+        self._sample = None
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def deinit(self):
+        self.stop()
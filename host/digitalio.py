@@ -0,0 +1,29 @@
+# Stand-in for the CircuitPython "digitalio" module.  Input levels come from
+# hostsim.inputs, keyed by pin name, so they can be scripted over time.
+import hostsim
+
+
+class Direction:
+    INPUT = "digitalio.Direction.INPUT"
+
+
+class Pull:
+    UP = "digitalio.Pull.UP"
+    DOWN = "digitalio.Pull.DOWN"
+
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+
+    @property
+    def value(self):
+        level = hostsim.inputs.get(self.pin.name)
+        if level is None:
+            return self.pull == Pull.UP
+        return bool(level)
+
+    def deinit(self):
+        pass
@@ -0,0 +1,147 @@
+# Shared state behind the host-side CircuitPython stand-ins in this directory.
+#
+# Nothing here runs on the Pico.  The stand-in modules (board, neopixel,
+# digitalio, ...) all talk to this module so that a headless run has:
+#   - one virtual clock, advanced only by modeled work and by sleeps
+#   - a script of timestamped input changes (switch levels, encoder
+#     positions, and lines typed into the serial console)
+#   - a registry of pixel strands whose buffers can be inspected
+import sys
+
+# supervisor.ticks_ms() wraps at 2**29 on CircuitPython
+TICKS_PERIOD = 1 << 29
+TICKS_MAX = TICKS_PERIOD - 1
+
+# NeoPixel wire timing: 800 kHz is 1.25us per bit, then a latch gap
+NEOPIXEL_US_PER_BYTE = 10
+NEOPIXEL_LATCH_US = 80
+
+
+class SimulationComplete(BaseException):
+    # Raised out of main_loop() once the virtual clock passes the end of a run
+    pass
+
+
+class WatchDogReset(BaseException):
+    # Raised out of main_loop() when the stand-in watchdog would reset the board
+    pass
+
+
+clock_us: int = 0
+ticks_offset_ms: int = 0
+end_us = None
+frame_cost_us: int = 0
+frame_hook = None
+show_hook = None  # called as show_hook(strand) as each NeoPixel transmit starts
+
+inputs = {}
+listeners = []  # called as listener(name, value, ticks) when a scripted input changes
+script = []
+script_index: int = 0
+
+strands = []
+watch_dog = None
+sound_duration_ms: int = 2000
+decode_cost_us: int = 0  # background decoding per loop iteration while a sound plays
+audio_outputs = []
+serial_input = bytearray()
+SERIAL = 'serial'  # script input name for a line typed into the console
+
+
+class SerialInput:
+    # sys.stdin for host runs: reads what the script has typed
+    def read(self, count=1):
+        text = bytes(serial_input[:count]).decode()
+        del serial_input[:count]
+        return text
+
+
+def reset(duration_ms=None, ticks_offset=0, frame_cost=0):
+    global clock_us, ticks_offset_ms, end_us, frame_cost_us, frame_hook, show_hook, script, script_index, watch_dog
+    global decode_cost_us
+    clock_us = 0
+    ticks_offset_ms = ticks_offset
+    end_us = None if duration_ms is None else duration_ms * 1000
+    frame_cost_us = frame_cost
+    decode_cost_us = 0
+    frame_hook = None
+    show_hook = None
+    inputs.clear()
+    del listeners[:]
+    script = []
+    script_index = 0
+    del strands[:]
+    del audio_outputs[:]
+    watch_dog = None
+    serial_input[:] = b''
+
+
+def set_script(events):
+    # events is an iterable of (time_ms, input_name, value)
+    global script, script_index
+    script = sorted(events, key=lambda event: event[0])
+    script_index = 0
+    _apply_script()
+
+
+def _apply_script():
+    global script_index
+    now_ms = clock_us // 1000
+    while script_index < len(script) and script[script_index][0] <= now_ms:
+        time_ms, name, value = script[script_index]
+        script_index += 1
+        if name == SERIAL:
+            serial_input.extend(value.encode() + b'\n')
+            continue
+        inputs[name] = value
+        for listener in listeners:
+            listener(name, value, (time_ms + ticks_offset_ms) & TICKS_MAX)
+
+
+def advance(microseconds):
+    global clock_us
+    clock_us += int(microseconds)
+    _apply_script()
+    if watch_dog is not None:
+        watch_dog.check(clock_us)
+    if end_us is not None and clock_us >= end_us:
+        raise SimulationComplete()
+
+
+def now_ms():
+    return clock_us // 1000
+
+
+def ticks_ms():
+    return (clock_us // 1000 + ticks_offset_ms) & TICKS_MAX
+
+
+def monotonic():
+    return clock_us / 1_000_000
+
+
+def sleep(seconds):
+    # main_loop() sleeps once per iteration, so a sleep ends a loop
+    # iteration: report it, then charge the modeled cost of the iteration's
+    # work (which on hardware would have elapsed before the sleep was
+    # computed) out of the requested sleep.  A playing sound's decoding
+    # runs in the background and comes on top of both.
+    if frame_hook is not None:
+        frame_hook()
+    sleep_us = int(seconds * 1_000_000)
+    if decode_cost_us and audio_playing():
+        advance(decode_cost_us)
+    advance(frame_cost_us)
+    if sleep_us > frame_cost_us:
+        advance(sleep_us - frame_cost_us)
+
+
+def audio_playing():
+    for output in audio_outputs:
+        if output.playing:
+            return True
+    return False
+
+
+def log(message):
+    sys.stderr.write(f"[hostsim {now_ms()}ms] {message}\n")
@@ -0,0 +1,91 @@
+# Stand-in for the CircuitPython "keypad" module.  Keys listens for scripted
+# level changes in hostsim and queues an event stamped with the time of the
+# change, like the background scanner would.
+from collections import deque
+
+import hostsim
+
+
+class Event:
+    def __init__(self, key_number=0, pressed=True):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.timestamp = 0
+
+    @property
+    def released(self):
+        return not self.pressed
+
+    def __repr__(self):
+        return f"<Event: key_number {self.key_number} {'pressed' if self.pressed else 'released'}>"
+
+
+class EventQueue:
+    def __init__(self, max_events):
+        self._events = deque()
+        self._max_events = max_events
+        self.overflowed = False
+
+    def _put(self, key_number, pressed, timestamp):
+        if len(self._events) >= self._max_events:
+            self.overflowed = True
+            return
+        self._events.append((key_number, pressed, timestamp))
+
+    def get(self):
+        if not self._events:
+            return None
+        event = Event()
+        self.get_into(event)
+        return event
+
+    def get_into(self, event):
+        if not self._events:
+            return False
+        event.key_number, event.pressed, event.timestamp = self._events.popleft()
+        return True
+
+    def clear(self):
+        self._events.clear()
+        self.overflowed = False
+
+    def __len__(self):
+        return len(self._events)
+
+    def __bool__(self):
+        return bool(self._events)
+
+
+class Keys:
+    def __init__(self, pins, *, value_when_pressed, pull=True, interval=0.02, max_events=64):
+        self.key_count = len(pins)
+        self.events = EventQueue(max_events)
+        self._names = [pin.name for pin in pins]
+        self._value_when_pressed = value_when_pressed
+        default_level = not value_when_pressed  # idle level, pulled away from pressed
+        self._pressed = []
+        for key_number, name in enumerate(self._names):
+            level = hostsim.inputs.get(name)
+            level = default_level if level is None else bool(level)
+            pressed = level == value_when_pressed
+            self._pressed.append(pressed)
+            if pressed:
+                self.events._put(key_number, True, hostsim.ticks_ms())
+        hostsim.listeners.append(self._changed)
+
+    def _changed(self, name, value, ticks):
+        if name not in self._names:
+            return
+        key_number = self._names.index(name)
+        pressed = bool(value) == self._value_when_pressed
+        if pressed != self._pressed[key_number]:
+            self._pressed[key_number] = pressed
+            self.events._put(key_number, pressed, ticks)
+
+    def reset(self):
+        for key_number in range(self.key_count):
+            self._pressed[key_number] = False
+
+    def deinit(self):
+        if self._changed in hostsim.listeners:
+            hostsim.listeners.remove(self._changed)
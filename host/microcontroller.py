@@ -0,0 +1,33 @@
+# Stand-in for the CircuitPython "microcontroller" module on an RP2040
+from watchdog import WatchDogTimer
+
+
+class ResetReason:
+    POWER_ON = "microcontroller.ResetReason.POWER_ON"
+    BROWNOUT = "microcontroller.ResetReason.BROWNOUT"
+    SOFTWARE = "microcontroller.ResetReason.SOFTWARE"
+    DEEP_SLEEP_ALARM = "microcontroller.ResetReason.DEEP_SLEEP_ALARM"
+    RESET_PIN = "microcontroller.ResetReason.RESET_PIN"
+    WATCHDOG = "microcontroller.ResetReason.WATCHDOG"
+    UNKNOWN = "microcontroller.ResetReason.UNKNOWN"
+    RESCUE_DEBUG = "microcontroller.ResetReason.RESCUE_DEBUG"
+
+
+class Processor:
+    def __init__(self):
+        self.uid = bytearray(b'\xe6\x61\x41\x04\x03\x2b\x5c\x2f')
+        self.frequency = 125_000_000
+        self.temperature = 27.0
+        self.voltage = 3.3
+        self.reset_reason = ResetReason.POWER_ON
+
+
+cpu = Processor()
+cpus = (cpu, Processor())
+nvm = bytearray(4096)
+watchdog = WatchDogTimer()
+
+
+def reset():
+    import hostsim
+    raise hostsim.SimulationComplete("microcontroller.reset()")
@@ -0,0 +1,5 @@
+# Stand-in for the MicroPython "micropython" module; adafruit_ticks imports const
+
+
+def const(value):
+    return value
@@ -0,0 +1,62 @@
+# MicroPython-flavored "gc" for host runs.  gc is built into CPython and
+# cannot be shadowed through sys.path, so the harness installs this module
+# as sys.modules['gc'].  The heap is modeled on an RP2040 running
+# CircuitPython; allocated bytes come from tracemalloc when it is tracing,
+# held at their high-water mark until collect(), since MicroPython only
+# gives memory back when it collects.  A collection charges the virtual clock a rough model of its mark and
+# sweep time on the RP2040.
+import sys
+import tracemalloc
+
+import hostsim
+
+_gc = sys.modules.get('_host_gc') or __import__('gc')
+sys.modules['_host_gc'] = _gc
+
+HEAP_SIZE = 192 * 1024
+COLLECT_US = 500  # plus COLLECT_US_PER_KB for each KB in use
+COLLECT_US_PER_KB = 20
+
+_threshold = -1
+_high_water = 0
+
+
+def collect():
+    global _high_water
+    hostsim.advance(COLLECT_US + min(mem_alloc(), HEAP_SIZE) * COLLECT_US_PER_KB // 1024)
+    _gc.collect()
+    _high_water = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+def enable():
+    _gc.enable()
+
+
+def disable():
+    _gc.disable()
+
+
+def isenabled():
+    return _gc.isenabled()
+
+
+def mem_alloc():
+    global _high_water
+    if tracemalloc.is_tracing():
+        _high_water = max(_high_water, tracemalloc.get_traced_memory()[0])
+    return _high_water
+
+
+def mem_free():
+    return max(0, HEAP_SIZE - mem_alloc())
+
+
+def threshold(amount=None):
+    global _threshold
+    if amount is None:
+        return _threshold
+    _threshold = amount
+
+
+def __getattr__(name):
+    return getattr(_gc, name)
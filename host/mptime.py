@@ -0,0 +1,25 @@
+# Virtual-clock "time" for host runs, installed by the harness as
+# sys.modules['time'].  sleep() and monotonic() follow hostsim's clock;
+# everything else (perf_counter, strftime, ...) is the real module.
+import sys
+
+import hostsim
+
+_time = sys.modules.get('_host_time') or __import__('time')
+sys.modules['_host_time'] = _time
+
+
+def sleep(seconds):
+    hostsim.sleep(seconds)
+
+
+def monotonic():
+    return hostsim.monotonic()
+
+
+def monotonic_ns():
+    return hostsim.clock_us * 1000
+
+
+def __getattr__(name):
+    return getattr(_time, name)
@@ -0,0 +1,101 @@
+# Stand-in for the Adafruit "neopixel" library.  Pixels are kept in a
+# bytearray in wire order; show() snapshots the transmitted frame into
+# last_frame, counts the transmit, reports it to hostsim.show_hook and
+# charges its wire time to the clock.
+import hostsim
+
+__version__ = "0.0.0-host"
+
+RGB = "RGB"
+GRB = "GRB"
+RGBW = "RGBW"
+GRBW = "GRBW"
+
+
+class NeoPixel:
+    def __init__(self, pin, n, *, bpp=None, brightness=1.0, auto_write=True, pixel_order=None):
+        if pixel_order is None:
+            pixel_order = GRB if bpp != 4 else GRBW
+        self.pin = pin
+        self.n = n
+        self.byteorder = pixel_order
+        self.bpp = len(pixel_order)
+        self._offsets = tuple(pixel_order.index(channel) for channel in "RGBW" if channel in pixel_order)
+        self.brightness = brightness
+        self.auto_write = auto_write
+        self.buf = bytearray(n * self.bpp)
+        self.last_frame = bytes(n * self.bpp)
+        self.writes = 0
+        self.shows = 0
+        self.bytes_sent = 0
+        hostsim.strands.append(self)
+
+    def __len__(self):
+        return self.n
+
+    def _parse(self, value):
+        if isinstance(value, int):
+            r, g, b, w = (value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff, 0
+            if self.bpp == 4 and r == g == b:
+                r, g, b, w = 0, 0, 0, r
+            return r, g, b, w
+        if len(value) == 3:
+            return value[0], value[1], value[2], 0
+        return tuple(value)
+
+    def _set(self, index, value):
+        r, g, b, w = self._parse(value)
+        base = index * self.bpp
+        channels = (r, g, b, w)
+        for channel, offset in enumerate(self._offsets):
+            self.buf[base + offset] = channels[channel]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            indices = range(*index.indices(self.n))
+            if len(value) == len(indices) * self.bpp:
+                # flat per-channel values, in RGB(W) order like _pixelbuf
+                for number, pixel in enumerate(indices):
+                    self._set(pixel, value[number * self.bpp:(number + 1) * self.bpp])
+            else:
+                for pixel, color in zip(indices, value):
+                    self._set(pixel, color)
+        else:
+            if index < 0:
+                index += self.n
+            if not 0 <= index < self.n:
+                raise IndexError("pixel index out of range")
+            self._set(index, value)
+        self.writes += 1
+        if self.auto_write:
+            self.show()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[pixel] for pixel in range(*index.indices(self.n))]
+        if index < 0:
+            index += self.n
+        base = index * self.bpp
+        return tuple(self.buf[base + offset] for offset in self._offsets)
+
+    def fill(self, color):
+        for pixel in range(self.n):
+            self._set(pixel, color)
+        self.writes += 1
+        if self.auto_write:
+            self.show()
+
+    def show(self):
+        if self.brightness < 1.0:
+            self.last_frame = bytes(int(value * self.brightness) for value in self.buf)
+        else:
+            self.last_frame = bytes(self.buf)
+        self.shows += 1
+        self.bytes_sent += len(self.buf)
+        if hostsim.show_hook is not None:
+            hostsim.show_hook(self)
+        hostsim.advance(len(self.buf) * hostsim.NEOPIXEL_US_PER_BYTE + hostsim.NEOPIXEL_LATCH_US)
+
+    def deinit(self):
+        self.fill(0)
+        self.show()
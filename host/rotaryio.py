@@ -0,0 +1,21 @@
+# Stand-in for the CircuitPython "rotaryio" module.  The position is read
+# from hostsim.inputs under the name of the encoder's first pin.
+import hostsim
+
+
+class IncrementalEncoder:
+    def __init__(self, pin_a, pin_b, divisor=4):
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self.divisor = divisor
+
+    @property
+    def position(self):
+        return int(hostsim.inputs.get(self.pin_a.name, 0))
+
+    @position.setter
+    def position(self, value):
+        hostsim.inputs[self.pin_a.name] = int(value)
+
+    def deinit(self):
+        pass
@@ -0,0 +1,22 @@
+# Stand-in for the CircuitPython "supervisor" module
+import hostsim
+
+
+def ticks_ms():
+    return hostsim.ticks_ms()
+
+
+class Runtime:
+    serial_connected = True
+    usb_connected = True
+
+    @property
+    def serial_bytes_available(self):
+        return len(hostsim.serial_input)
+
+
+runtime = Runtime()
+
+
+def reload():
+    raise hostsim.SimulationComplete("supervisor.reload()")
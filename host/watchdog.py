@@ -0,0 +1,45 @@
+# Stand-in for the CircuitPython "watchdog" module
+import hostsim
+
+
+class WatchDogMode:
+    RAISE = "WatchDogMode.RAISE"
+    RESET = "WatchDogMode.RESET"
+
+
+class WatchDogTimeout(Exception):
+    pass
+
+
+class WatchDogTimer:
+    def __init__(self):
+        self.timeout = 0
+        self._mode = None
+        self._last_feed_us = 0
+        self.feeds = 0
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode):
+        self._mode = mode
+        self._last_feed_us = hostsim.clock_us
+        hostsim.watch_dog = self if mode is not None else None
+
+    def feed(self):
+        self._last_feed_us = hostsim.clock_us
+        self.feeds += 1
+
+    def deinit(self):
+        self.mode = None
+
+    def check(self, clock_us):
+        if self._mode is None or clock_us - self._last_feed_us <= self.timeout * 1_000_000:
+            return
+        starved_ms = (clock_us - self._last_feed_us) // 1000
+        if self._mode == WatchDogMode.RAISE:
+            self._last_feed_us = clock_us
+            raise WatchDogTimeout(f"watchdog starved for {starved_ms}ms")
+        raise hostsim.WatchDogReset(f"watchdog starved for {starved_ms}ms")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# Pack inputs as a queue of timestamped edge events.
+#
+# The hero switch and trigger are scanned and debounced in the background
+# by CircuitPython's keypad module, so the loop only drains a queue, and
+# does nothing when it is empty.  Events carry the supervisor.ticks_ms()
+# time of the edge, which makes input-to-output latency measurable.
+import digitalio
+import keypad
+import rotaryio
+
+# Key numbers in the scanner, in the order the pins are given
+HERO_SWITCH = 0
+TRIGGER = 1
+
+
+class Inputs:
+    def __init__(self, hero_switch_pin, trigger_pin, encoder_clock_pin, encoder_dt_pin):
+        # Both switches are wired from their pin to GND, so pressed is low.
+        # The scanner only reports changes, so read where the hero switch
+        # starts before handing its pin over.
+        hero_switch_input = digitalio.DigitalInOut(hero_switch_pin)
+        hero_switch_input.direction = digitalio.Direction.INPUT
+        hero_switch_input.pull = digitalio.Pull.UP
+        self.hero_switch_closed: bool = not hero_switch_input.value
+        hero_switch_input.deinit()
+
+        self.keys = keypad.Keys((hero_switch_pin, trigger_pin), value_when_pressed=False, pull=True)
+        self.event = keypad.Event()
+        self.encoder = rotaryio.IncrementalEncoder(encoder_clock_pin, encoder_dt_pin)
+
+    def next_event(self):
+        # Fill self.event with the next change and return True, or return
+        # False once the queue is empty.  Hero switch events that repeat its
+        # known position (e.g. the scanner's first look at a closed switch)
+        # are dropped here.
+        event = self.event
+        while self.keys.events.get_into(event):
+            if event.key_number == HERO_SWITCH:
+                if event.pressed == self.hero_switch_closed:
+                    continue
+                self.hero_switch_closed = event.pressed
+            return True
+        return False
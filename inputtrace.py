@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Compact binary recording of a session's inputs, for replay on a computer.
+#
+# Each hero switch and trigger edge, and each new encoder position, is one
+# fixed-width record: ms since the trace started, what changed, and its new
+# value.  Records are packed into a preallocated buffer in the loop and
+# written out in a low-priority flush, like the event log.  simulate.py
+# --trace turns a trace back into input changes against its virtual clock.
+#
+# The file starts with a header: a magic number, the format version and the
+# ms from the start of the boot to the start of the trace, so a replay can
+# line the trace up with its own boot.  The boot starts as protonpack is
+# imported, after power-on or a reload (see telemetry.BootProfile).  CIRCUITPY is only writable by code when
+# boot.py remounts it; otherwise recording is turned off with a message.
+import struct
+
+from adafruit_ticks import ticks_diff
+
+MAGIC = b'PPIT'
+VERSION = 1
+HEADER = '<4sBI'  # magic, version, ms from the start of the boot to the first record
+RECORD = '<IBi'  # ms since the trace started, kind, value
+HEADER_SIZE = struct.calcsize(HEADER)
+RECORD_SIZE = struct.calcsize(RECORD)
+
+# Record kinds; the switches use their key numbers from inputs.py
+HERO_SWITCH = 0  # value: 1 when closed
+TRIGGER = 1  # value: 1 when pulled
+ENCODER = 2  # value: encoder position
+
+
+class TraceRecorder:
+    def __init__(self, path, start_ticks, boot_ms, capacity=64):
+        self.file = open(path, 'wb')
+        self.file.write(struct.pack(HEADER, MAGIC, VERSION, boot_ms))
+        self.start_ticks: int = start_ticks
+        self.capacity: int = capacity
+        self.buffer = bytearray(capacity * RECORD_SIZE)
+        self.view = memoryview(self.buffer)
+        self.count: int = 0  # records waiting to be written
+        self.written: int = 0
+
+    def record(self, ticks, kind, value):
+        if self.count == self.capacity:
+            self.flush()  # only when inputs outrun the flush job
+        struct.pack_into(RECORD, self.buffer, self.count * RECORD_SIZE,
+                         ticks_diff(ticks, self.start_ticks), kind, value)
+        self.count += 1
+
+    def flush(self):
+        if not self.count:
+            return
+        self.file.write(self.view[:self.count * RECORD_SIZE])
+        self.file.flush()
+        self.written += self.count
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_trace(path):
+    # Returns (ms from the start of the boot to the trace start, [(ms, kind, value), ...])
+    with open(path, 'rb') as trace_file:
+        data = trace_file.read()
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be an input trace")
+    magic, version, boot_ms = struct.unpack_from(HEADER, data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} input trace")
+    records = []
+    for offset in range(HEADER_SIZE, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+        records.append(struct.unpack_from(RECORD, data, offset))
+    return boot_ms, records
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# Build the palette cache for settings.toml on the computer.
+#
+# The pack reads its gamma-corrected colors from palette_cache when the
+# file matches its color settings, which skips the fancyled math at boot
+# (see palette.py).  The pack can't write CIRCUITPY itself, so make
+# install runs this and copies the file over.  A cache that no longer
+# matches is ignored, and the pack computes the colors as before.
+#
+#   python3 makepalette.py
+#   python3 makepalette.py --settings other.toml --output palette.cache
+import argparse
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(REPO_DIR, 'host'))  # config.py checks pin names against board
+
+import config  # noqa: E402
+from palette import FIXED_COLORS, write_cache  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the palette cache for a settings.toml")
+    parser.add_argument('--settings', default=config.SETTINGS_FILE, help="settings file to read")
+    parser.add_argument('--output', help="cache file to write; palette_cache from the settings by default")
+    args = parser.parse_args()
+
+    try:
+        settings = config.load(args.settings)
+    except ValueError as error:
+        sys.exit(str(error))
+    output = args.output or settings.palette_cache
+    if not output:
+        sys.exit(f"{args.settings}: palette_cache is empty, so the pack doesn't use a cache")
+    base = write_cache(output, settings.color_list + FIXED_COLORS, settings.color_levels, settings.color_gamma)
+    print(f"{output}: {len(base)} colors")
+
+
+if __name__ == '__main__':
+    main()
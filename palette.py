@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# Colors corrected once, instead of on every pixel write.
+#
+# A NeoPixel strand with a fractional brightness= scales every channel of
+# every pixel each time it is written.  A Palette applies gamma, the
+# per-channel color levels and the strand's brightness up front, producing
+# per-pixel channel tuples in the strand's channel order (R, G, B, or
+# R, G, B, W) so the strand can run at brightness 1.0 and copy them as is.
+#
+# The gamma step is the slow part (fancyled, floating point), and its
+# result doesn't depend on brightness, so it is kept as base colors,
+# optionally read from a cache file keyed by its inputs.  Changing
+# brightness only rescales the base colors.  Code can't write to CIRCUITPY
+# without a boot.py remount, so the cache is built on the computer by
+# makepalette.py and installed with the rest (make install).
+
+# After color_list: white for the firing flash, green and blue for the meter
+FIXED_COLORS = (0xffffff, 0x00ff00, 0x0000ff)
+
+
+def _cache_key(colors, levels, gamma):
+    return f"{gamma} {','.join(str(level) for level in levels)} {','.join(f'{color:06x}' for color in colors)}"
+
+
+def gamma_colors(colors, levels, gamma):
+    # Gamma- and level-adjusted packed 0xRRGGBB ints, the slow way
+    import adafruit_fancyled.adafruit_fancyled as fancyled  # only needed on a cache miss
+    return tuple(fancyled.gamma_adjust(fancyled.CRGB(color >> 16, (color >> 8) & 0xff, color & 0xff),
+                                       gamma_value=gamma, brightness=levels).pack()
+                 for color in colors)
+
+
+def load_base_colors(colors, levels, gamma, cache_path=None):
+    # Returns (base colors, True if they came from the cache); a missing or
+    # stale cache means computing them
+    if cache_path:
+        try:
+            with open(cache_path) as cache_file:
+                if cache_file.readline().rstrip('\n') == _cache_key(colors, levels, gamma):
+                    return tuple(int(color, 16) for color in cache_file.readline().split(',')), True
+        except (OSError, ValueError):
+            pass
+    return gamma_colors(colors, levels, gamma), False
+
+
+def write_cache(cache_path, colors, levels, gamma):
+    # Compute the base colors and save them where load_base_colors() looks
+    base = gamma_colors(colors, levels, gamma)
+    with open(cache_path, 'w') as cache_file:
+        cache_file.write(f"{_cache_key(colors, levels, gamma)}\n{','.join(f'{color:06x}' for color in base)}\n")
+    return base
+
+
+class Palette:
+    def __init__(self, base, bpp=3, brightness=1.0):
+        self.base = base  # gamma-adjusted 0xRRGGBB ints
+        self.bpp: int = bpp
+        self.colors = ()
+        self.off = (0,) * bpp
+        self.set_brightness(brightness)
+
+    def set_brightness(self, brightness):
+        # Rebuild the strand colors; anything rendered from the old ones needs redrawing
+        self.brightness: float = brightness
+        self.colors = tuple(self.scale(color) for color in self.base)
+
+    def scale(self, color, brightness=None):
+        # A packed 0xRRGGBB color as strand channels, at the palette's brightness by default
+        if brightness is None:
+            brightness = self.brightness
+        red = int(((color >> 16) & 0xff) * brightness)
+        green = int(((color >> 8) & 0xff) * brightness)
+        blue = int((color & 0xff) * brightness)
+        if self.bpp == 3:
+            return red, green, blue
+        if red == green == blue:
+            return 0, 0, 0, red  # grays go to the white LED, as the driver does for packed ints
+        return red, green, blue, 0
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# Logical strands laid out over segments of physical NeoPixel strands.
+#
+# A layout is a list of segments, each a run of pixels on one pin, which
+# may be wired backwards or use a different pixel order than the rest of
+# its pin.  Segments on the same pin are chained in the order they are
+# listed, across all layouts.
+#
+# A MappedStrand is double buffered.  Effects write into its back buffer,
+# buf, in logical pixel order.  show() compares buf with front, the frame
+# last transmitted, and does nothing if they match; otherwise it copies
+# each segment into its physical strand with one slice assignment,
+# transmits each physical strand once and keeps a copy as the new front.
+# Transmits and skips are counted, to show what each effect really sends.
+import array
+
+from effects import WHOLE_STRAND
+
+_CHANNELS = "RGBW"  # the order NeoPixel slice assignment takes flat values in
+
+
+class Segment:
+    def __init__(self, pin, count, reverse=False, pixel_order=None):
+        self.pin = pin
+        self.count: int = count
+        self.reverse: bool = reverse
+        self.pixel_order = pixel_order  # None for the layout's default
+        self.strand = None
+        self.slice = None  # pixels of the physical strand, backwards if reversed
+        self.window = None  # bytes of the MappedStrand's buffer
+        self.scratch = None  # reordered copy, when the channels don't line up
+        self.table = None  # scratch byte -> window byte, or -1 for a zero
+
+
+class MappedStrand:
+    def __init__(self, segments, bpp):
+        self.segments = segments
+        self.n: int = sum(segment.count for segment in segments)
+        self.bpp: int = bpp
+        self.buf = bytearray(self.n * bpp)  # back buffer
+        self.view = memoryview(self.buf)
+        self.front = bytearray(self.n * bpp)  # last transmitted frame
+        self.synced: bool = False  # the first show always transmits
+        self.strands = []  # each physical strand once, in first-use order
+        self.transmits: int = 0
+        self.skipped: int = 0
+        self.bytes_sent: int = 0
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, index, value):
+        bpp = self.bpp
+        if isinstance(index, slice):
+            # Flat channel values, as for NeoPixel slice assignment (step 1 only)
+            if index.start is None and index.stop is None:
+                self.buf[index] = value  # the whole strand, without a new slice
+            else:
+                start = 0 if index.start is None else index.start
+                stop = self.n if index.stop is None else index.stop
+                self.buf[start * bpp:stop * bpp] = value
+            return
+        if index < 0:
+            index += self.n
+        buf = self.buf
+        start = index * bpp
+        if isinstance(value, int):
+            buf[start] = (value >> 16) & 0xff
+            buf[start + 1] = (value >> 8) & 0xff
+            buf[start + 2] = value & 0xff
+            if bpp == 4:
+                buf[start + 3] = 0
+        else:
+            buf[start] = value[0]
+            buf[start + 1] = value[1]
+            buf[start + 2] = value[2]
+            if bpp == 4:
+                buf[start + 3] = value[3] if len(value) > 3 else 0
+
+    def fill(self, value):
+        self[0] = value
+        view = self.view
+        filled = self.bpp
+        while filled < len(view):  # double the filled run each pass
+            run = min(filled, len(view) - filled)
+            view[filled:filled + run] = view[:run]
+            filled += run
+
+    def show(self):
+        if self.synced and self.buf == self.front:
+            self.skipped += 1
+            return
+        for segment in self.segments:
+            if segment.table is None:
+                segment.strand[segment.slice] = segment.window
+            else:
+                window = segment.window
+                scratch = segment.scratch
+                table = segment.table
+                for byte in range(len(scratch)):
+                    source = table[byte]
+                    scratch[byte] = window[source] if source >= 0 else 0
+                segment.strand[segment.slice] = scratch
+        for strand in self.strands:
+            strand.show()
+            self.bytes_sent += len(strand) * strand.bpp
+        self.front[WHOLE_STRAND] = self.buf
+        self.synced = True
+        self.transmits += 1
+
+    def counts(self):
+        # (transmits, skipped, bytes sent) since the last call
+        counts = (self.transmits, self.skipped, self.bytes_sent)
+        self.transmits = self.skipped = self.bytes_sent = 0
+        return counts
+
+
+def _reorder_table(count, logical_bpp, segment_order, strand_order):
+    # The strand's driver writes flat value "RGBW".index(strand_order[k]) of
+    # each pixel as its k-th byte on the wire, and this segment's LEDs read
+    # their k-th byte as channel segment_order[k]
+    strand_bpp = len(strand_order)
+    pixel = [-1] * strand_bpp
+    for k in range(min(strand_bpp, len(segment_order))):
+        source = _CHANNELS.index(segment_order[k])
+        pixel[_CHANNELS.index(strand_order[k])] = source if source < logical_bpp else -1
+    return array.array('h', [source + logical_bpp * p if source >= 0 else -1
+                             for p in range(count) for source in pixel])
+
+
+def map_strands(neopixel, layouts, default_orders):
+    # layouts: one list of Segments per logical strand; default_orders: the
+    # pixel order for each layout's segments that don't name one.
+    # Returns a MappedStrand per layout.
+    for segments, default_order in zip(layouts, default_orders):
+        for segment in segments:
+            if segment.pixel_order is None:
+                segment.pixel_order = default_order
+
+    # One physical strand per pin, long enough for all its segments
+    pins = []
+    offsets = []
+    for segments in layouts:
+        for segment in segments:
+            if segment.pin not in pins:
+                pins.append(segment.pin)
+                offsets.append([0, segment.pixel_order])
+            offset = offsets[pins.index(segment.pin)]
+            if len(segment.pixel_order) != len(offset[1]):
+                raise ValueError(f"{segment.pin} mixes {len(offset[1])} and {len(segment.pixel_order)} byte pixels")
+            segment.slice = (offset[0], offset[0] + segment.count)
+            offset[0] += segment.count
+    physical = [neopixel.NeoPixel(pin, length, brightness=1.0, auto_write=False, pixel_order=order)
+                for pin, (length, order) in zip(pins, offsets)]
+
+    strands = []
+    for segments in layouts:
+        first = segments[0]
+        mapped = MappedStrand(segments, len(first.pixel_order))
+        view = mapped.view
+        logical = 0
+        for segment in segments:
+            segment.strand = physical[pins.index(segment.pin)]
+            start, stop = segment.slice
+            if segment.reverse:
+                segment.slice = slice(stop - 1, start - 1 if start else None, -1)
+            else:
+                segment.slice = slice(start, stop)
+            segment.window = view[logical * mapped.bpp:(logical + segment.count) * mapped.bpp]
+            logical += segment.count
+            strand_order = offsets[pins.index(segment.pin)][1]
+            if segment.pixel_order != strand_order or len(strand_order) != mapped.bpp:
+                segment.table = _reorder_table(segment.count, mapped.bpp, segment.pixel_order, strand_order)
+                segment.scratch = bytearray(len(segment.table))
+            if segment.strand not in mapped.strands:
+                mapped.strands.append(segment.strand)
+        strands.append(mapped)
+    return strands
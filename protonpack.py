@@ -1,73 +1,54 @@
 #!/usr/bin/env python3
 
 import gc
-import os
 import random
-import sys
+import time
+
+# Boot stages are timed from here, not from power-on; see telemetry.BootProfile
+IMPORT_START_NS = time.monotonic_ns()
 
-import audiomp3
 import audiopwmio
-import rotaryio
 import supervisor
 from watchdog import WatchDogMode
 
-import adafruit_fancyled.adafruit_fancyled as fancyled
-import board
-import digitalio
 import microcontroller
 import neopixel
-from adafruit_debouncer import Debouncer
+from adafruit_ticks import ticks_diff
+import config
+import eventlog
+import inputtrace
+import telemetry
+from animation import EASE_IN, EASE_IN_OUT, EASE_OUT, Ramp
+from audioload import AudioLoad
+from console import Console
+from crashlog import CrashLog
 from code import __version__  # Import __version__ from code.py
-
-
-# State definitions
-class State:
-    POWER_ON = 1
-    STANDBY = 2
-    LOOP_IDLE = 3
-
-
-# Function to get a pin from board module
-def get_pin(pin_name):
-    try:
-        return getattr(board, pin_name)
-    except AttributeError:
-        raise ValueError(f"Pin {pin_name} not found on board")
-
-
-# Load constants
-def load_constants():
-    constants = {}
-
-    # Convert environment variable strings to integers where appropriate
-    constants['stat_clock_time_ms'] = int(os.getenv('stat_clock_time_ms', "5000"))
-    constants['sleep_time_secs'] = float(os.getenv('sleep_time_secs', "0.01"))
-    constants['audio_out_pin'] = get_pin(os.getenv('audio_out_pin', "GP21"))
-    constants['startup_mp3_filename'] = os.getenv('startup_mp3_filename', "lib/KJH_PackstartCombo.mp3")
-    constants['shutdown_mp3_filename'] = os.getenv('shutdown_mp3_filename', "lib/KJH_PackstopCombo.mp3")
-    constants['firing_mp3_filename'] = os.getenv('firing_mp3_filename', "lib/KJH_Nutrona3.mp3")
-    constants['neopixel_ring_pin'] = get_pin(os.getenv('neopixel_ring_pin', "GP28"))
-    constants['neopixel_ring_size'] = int(os.getenv('neopixel_ring_size', "60"))
-    constants['neopixel_ring_cursor_size'] = int(os.getenv('neopixel_ring_cursor_size', "3"))
-    constants['neopixel_ring_brightness'] = float(os.getenv('neopixel_ring_brightness', "0.05"))
-    constants['neopixel_stick_pin'] = get_pin(os.getenv('neopixel_stick_pin', "GP27"))
-    constants['neopixel_stick_size'] = int(os.getenv('neopixel_stick_size', "20"))
-    constants['neopixel_stick_brightness'] = float(os.getenv('neopixel_stick_brightness', "0.1"))
-    constants['audio_out_pin'] = get_pin(os.getenv('audio_out_pin', "GP21"))
-    constants['hero_switch_pin'] = get_pin(os.getenv('hero_switch_pin', "GP9"))
-    constants['rotary_encoder_button_pin'] = get_pin(os.getenv('rotary_encoder_button_pin', "GP10"))
-    constants['rotary_encoder_dt_pin'] = get_pin(os.getenv('rotary_encoder_dt_pin', "GP11"))
-    constants['rotary_encoder_clock_pin'] = get_pin(os.getenv('rotary_encoder_clock_pin', "GP12"))
-    constants['cyclotron_speed'] = int(os.getenv('cyclotron_speed', "30"))
-    constants['cyclotron_starting_speed'] = int(os.getenv('cyclotron_starting_speed', "300"))
-    constants['power_meter_speed'] = int(os.getenv('power_meter_speed', "10"))
-    constants['power_meter_starting_speed'] = int(os.getenv('power_meter_starting_speed', "100"))
-    constants['watch_dog_timeout_secs'] = int(os.getenv('watch_dog_timeout_secs', "7"))
-
-    print(f" - Loaded {len(constants)} constants from settings.toml")
-    for i in sorted(constants):
-        print(f"    - {i} = {constants[i]}")
-    return constants
+from effects import FLASH_COLOR, FLASH_OFF, FLASH_RANDOM, FLASH_WHITE, WHOLE_STRAND, CyclotronFrames, FlashPattern
+from eventlog import EventLog
+from gcmanager import MemoryManager
+from inputs import Inputs
+from inputtrace import TraceRecorder
+from palette import FIXED_COLORS, Palette, load_base_colors
+from pixelmap import Segment, map_strands
+from telemetry import BootProfile, LoopTimer
+from scheduler import Scheduler
+from soundbank import SoundBank
+from state import EVENT_COUNT, STATE_COUNT, Event, State
+from statemachine import StateMachine
+
+
+# Steps in the cyclotron's spin-up and spin-down fades
+CYCLOTRON_LEVELS = 32
+
+# How often typed settings commands are picked up; see console.py
+CONSOLE_POLL_MS = 100
+
+# The crash log's first record, and how soon to try again when a sound or
+#   the trigger makes it a bad time to stall for a flash write; see crashlog.py
+CRASH_LOG_FIRST_MS = 10000
+CRASH_LOG_RETRY_MS = 1000
+# Events too routine to be the crash log's last event
+ROUTINE_EVENTS = (eventlog.WATCH_DOG_FED, eventlog.GC_COLLECTED, eventlog.GC_AUTOMATIC)
 
 
 def setup_watch_dog(timeout):
@@ -81,325 +62,685 @@ def setup_watch_dog(timeout):
     return watch_dog
 
 
-def format_time(milliseconds):
-    seconds = milliseconds // 1000
-    milliseconds = milliseconds % 1000
-    tenths_of_seconds = milliseconds // 100  # Get the first digit of the milliseconds to represent tenths of a second
-
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    seconds = seconds % 60
-
-    return f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}.{int(tenths_of_seconds)}"
-
-
 def clamp(value, min_value, max_value):
     return max(min_value, min(value, max_value))
 
 
-def print_state(state):
-    if state == State.POWER_ON:
-        return 'POWER_ON'
-    elif state == State.STANDBY:
-        return 'STANDBY'
-    elif state == State.LOOP_IDLE:
-        return 'LOOP_IDLE'
-    else:
-        return f"? ({state})"
-
-
-def print_cpu_id():
-    # Convert UID bytearray to a hex string and print it
-    uid_hex = ':'.join(['{:02x}'.format(x) for x in microcontroller.cpu.uid])
-    print(f" - cpu uid: {uid_hex}")
-
-
-def pretty_print_bytes(size):
-    # Define unit thresholds and labels
-    units = ["bytes", "KB", "MB", "GB"]
-    step = 1024
-
-    # Find the largest unit to express the size in full units
-    for unit in units:
-        if size < step:
-            return f"{size:.2f} {unit}"
-        size /= step
-
-    # If size is large, it will be formatted in GB from the loop
-    return f"{size:.2f} GB"
-
-
 def main_loop():
-    # Print startup information
+    # Startup lights the pixels and starts the startup sound as soon as it
+    # can; the diagnostics and the rest of the sounds wait for the
+    # 'diagnostics' job once the loop is running
+    boot = BootProfile(IMPORT_START_NS)
     print(f"-=< protonpack v{__version__} - https://github.com/algrym/protonpack/ >=-")
-    print(f" - uname: {os.uname()}")
-    print_cpu_id()
-    print(f" -- freq: {microcontroller.cpu.frequency / 1e6} MHz")
-    print(f" -- reset reason: {microcontroller.cpu.reset_reason}")
-    print(f" -- nvm: {pretty_print_bytes(len(microcontroller.nvm))}")
-    print(f" - python v{sys.version}")
-    gc.collect()
-    starting_memory_free = gc.mem_free()
-    print(f" - Free memory: {pretty_print_bytes(starting_memory_free)}")
-
-    # Read in constants
-    constants = load_constants()
-
-    # Color constants
-    brightness_levels = (0.25, 0.3, 0.15)
-    RED = fancyled.gamma_adjust(fancyled.CRGB(255, 0, 0), brightness=brightness_levels).pack()
-    ORANGE = fancyled.gamma_adjust(fancyled.CRGB(255, 165, 0), brightness=brightness_levels).pack()
-    YELLOW = fancyled.gamma_adjust(fancyled.CRGB(255, 255, 0), brightness=brightness_levels).pack()
-    GREEN = fancyled.gamma_adjust(fancyled.CRGB(0, 255, 0), brightness=brightness_levels).pack()
-    BLUE = fancyled.gamma_adjust(fancyled.CRGB(0, 0, 255), brightness=brightness_levels).pack()
-    PURPLE = fancyled.gamma_adjust(fancyled.CRGB(128, 0, 128), brightness=brightness_levels).pack()
-    WHITE = fancyled.gamma_adjust(fancyled.CRGB(255, 255, 255), brightness=brightness_levels).pack()
-    ON = (255, 255, 255)
-    OFF = (0, 0, 0)
-    color_list = [RED, ORANGE, YELLOW, GREEN, BLUE, PURPLE, WHITE]
-
-    # Initialize Neopixels
-    print(f" - neopixel v{neopixel.__version__}")
-    print(f"   - NeoPixel stick size {constants['neopixel_stick_size']} on {constants['neopixel_stick_pin']}")
-    stick_pixels = neopixel.NeoPixel(constants['neopixel_stick_pin'],
-                                     constants['neopixel_stick_size'],
-                                     brightness=constants['neopixel_stick_brightness'],
-                                     pixel_order=neopixel.GRBW)  # TODO: this should come from settings.toml
-    stick_pixels.fill(OFF)
-
-    print(f"   - NeoPixel ring size {constants['neopixel_ring_size']} on {constants['neopixel_ring_pin']}")
-    ring_pixels = neopixel.NeoPixel(constants['neopixel_ring_pin'],
-                                    constants['neopixel_ring_size'],
-                                    brightness=constants['neopixel_ring_brightness'])
-    ring_pixels.fill(OFF)
-
-    # Initialize switch input
-    print(f"   - Input select on {constants['hero_switch_pin']}")
-    hero_switch_pin_input = digitalio.DigitalInOut(constants['hero_switch_pin'])
-    hero_switch_pin_input.direction = digitalio.Direction.INPUT
-    # expecting switch wired from its pin to GND
-    hero_switch_pin_input.pull = digitalio.Pull.UP
-    hero_switch = Debouncer(hero_switch_pin_input)
-
-    # initialize rotary encoder button
-    print(" - Rotary encoder:")
-    print(f"   - button on {constants['rotary_encoder_button_pin']}")
-    rotary_encoder_button_input = digitalio.DigitalInOut(constants['rotary_encoder_button_pin'])
-    rotary_encoder_button_input.direction = digitalio.Direction.INPUT
-    rotary_encoder_button_input.pull = digitalio.Pull.UP
-    rotary_encoder_button = Debouncer(rotary_encoder_button_input)
-
-    # initialize rotary encoder
-    print(f"   -  clock on {constants['rotary_encoder_clock_pin']}")
-    print(f"   -     dt on {constants['rotary_encoder_dt_pin']}")
-    rotary_encoder = rotaryio.IncrementalEncoder(constants['rotary_encoder_clock_pin'],
-                                                 constants['rotary_encoder_dt_pin'])
-
-    # Initialize audio and startup noise
-    print(f" - Audio out on {constants['audio_out_pin']}")
-    audio = audiopwmio.PWMAudioOut(constants['audio_out_pin'])
 
-    print(f" - Loading startup MP3: {constants['startup_mp3_filename']}")
-    decoder_startup = audiomp3.MP3Decoder(open(constants['startup_mp3_filename'], 'rb'))
+    # Read and check settings.toml before touching any hardware
+    settings = config.load()
+    boot.mark('settings')
 
-    print(f" - Loading shutdown MP3: {constants['shutdown_mp3_filename']}")
-    decoder_shutdown = audiomp3.MP3Decoder(open(constants['shutdown_mp3_filename'], 'rb'))
+    OFF = (0, 0, 0)
 
-    print(f" - Loading firing MP3: {constants['firing_mp3_filename']}")
-    decoder_firing = audiomp3.MP3Decoder(open(constants['firing_mp3_filename'], 'rb'))
+    # Initialize Neopixels
+    #   auto_write is off: writes only touch the buffer, and each strand that
+    #   changed is transmitted once at the end of the loop iteration.
+    #   Brightness is left at 1.0 and applied by the palettes below instead.
+    #   Each is laid out over one or more segments of physical strands; see pixelmap.py.
+    ring_pixels, stick_pixels = map_strands(
+        neopixel,
+        ([Segment(*segment) for segment in settings.neopixel_ring_segments],
+         [Segment(*segment) for segment in settings.neopixel_stick_segments]),
+        (settings.neopixel_ring_pixel_order, settings.neopixel_stick_pixel_order))
+
+    # Colors are gamma-corrected once (or read back from the cache), then
+    #   scaled to each strand's brightness and channel order
+    color_count = len(settings.color_list)
+    base_colors, palette_cached = load_base_colors(settings.color_list + FIXED_COLORS,
+                                                   settings.color_levels, settings.color_gamma,
+                                                   settings.palette_cache)
+    ring_palette = Palette(base_colors, ring_pixels.bpp, settings.neopixel_ring_brightness)
+    stick_palette = Palette(base_colors, stick_pixels.bpp, settings.neopixel_stick_brightness)
+    color_list = ring_palette.colors[:color_count]
+    WHITE = ring_palette.colors[color_count]
+    ON = ring_palette.scale(0xffffff)  # full white, no gamma
+    GREEN = stick_palette.colors[color_count + 1]
+    BLUE = stick_palette.colors[color_count + 2]
+    boot.mark('pixels')
+
+    # Initialize switch, trigger and rotary encoder inputs
+    inputs = Inputs(settings.hero_switch_pin,
+                    settings.rotary_encoder_button_pin,
+                    settings.rotary_encoder_clock_pin,
+                    settings.rotary_encoder_dt_pin)
+    input_event = inputs.event
+
+    # Start in the state the hero switch is in; the transitions, hooks and
+    #   per-state handlers are registered once they're defined, below
+    machine = StateMachine(STATE_COUNT, EVENT_COUNT,
+                           State.STANDBY if inputs.hero_switch_closed else State.LOOP_IDLE)
+    boot.mark('inputs')
+
+    # Optionally record the inputs for replay on a computer (see inputtrace.py);
+    # the starting hero switch position goes in at 0ms
+    input_trace = None
+    if settings.input_trace_file:
+        try:
+            input_trace = TraceRecorder(settings.input_trace_file, supervisor.ticks_ms(),
+                                        int(boot.elapsed_ms('inputs')))
+            input_trace.record(input_trace.start_ticks, inputtrace.HERO_SWITCH, inputs.hero_switch_closed)
+        except OSError as error:
+            print(f" - Not recording inputs to {settings.input_trace_file}: {error}")
+            input_trace = None
 
     # Initialize cyclotron counters
-    cyclotron_speed: int = constants['cyclotron_speed']
-    next_cyclotron_clock: int = 0
-    cyclotron_cursor_width: int = constants['neopixel_ring_cursor_size']
+    cyclotron_cursor_width: int = settings.neopixel_ring_cursor_size
     cyclotron_cursor_on: int = 0
     cyclotron_cursor_off: int = 0
     cyclotron_color_index: int = 0
 
+    # Spin-up, spin-down and overheat move these along easing curves over
+    #   wall-clock time; see animation.py.  The cyclotron's brightness is
+    #   faded in CYCLOTRON_LEVELS steps, re-rendering its frames per step.
+    ramp_start: int = supervisor.ticks_ms()
+    cyclotron_period = Ramp(settings.cyclotron_speed)
+    cyclotron_fade = Ramp(CYCLOTRON_LEVELS)
+    cyclotron_level: int = CYCLOTRON_LEVELS
+    power_meter_rate = Ramp(settings.power_meter_speed)
+    power_meter_drain = Ramp(settings.power_meter_speed * 50)
+    if machine.state == State.LOOP_IDLE:
+        # Booting with the pack on: spin up along with the startup sound
+        cyclotron_period.jump(settings.cyclotron_starting_speed)
+        cyclotron_period.to(ramp_start, settings.cyclotron_speed, settings.spin_up_ms, EASE_OUT)
+        cyclotron_fade.jump(CYCLOTRON_LEVELS // 4)
+        cyclotron_fade.to(ramp_start, CYCLOTRON_LEVELS, settings.spin_up_ms, EASE_IN_OUT)
+        cyclotron_level = CYCLOTRON_LEVELS // 4
+        power_meter_rate.jump(settings.power_meter_starting_speed)
+        power_meter_rate.to(ramp_start, settings.power_meter_speed, settings.spin_up_ms, EASE_OUT)
+
+    # Precompute every cursor position of the ring for the current color and fade level
+    def render_cyclotron():
+        if cyclotron_level == CYCLOTRON_LEVELS:
+            color = color_list[cyclotron_color_index]
+        else:
+            color = ring_palette.scale(ring_palette.base[cyclotron_color_index],
+                                       ring_palette.brightness * cyclotron_level / CYCLOTRON_LEVELS)
+        cyclotron_frames.render(color, cyclotron_cursor_width, settings.neopixel_ring_cursor_count)
+
+    # The comet draws gradients, tails and fading sparks with ulab arrays;
+    #   without ulab it falls back to the plain cyclotron
+    sparks_fade: bool = False
+    if settings.ring_effect == 'comet':
+        import arrayfx
+        if arrayfx.HAVE_ARRAYS:
+            sparks_fade = True
+        else:
+            print(" - No ulab in this CircuitPython build, using the plain cyclotron")
+    if sparks_fade:
+        cyclotron_frames = arrayfx.CometRing(len(ring_pixels), ring_pixels.bpp,
+                                             settings.comet_tail, settings.spark_decay)
+        cyclotron_frames.set_spark_color(ON)
+    else:
+        cyclotron_frames = CyclotronFrames(len(ring_pixels), ring_pixels.bpp)
+    render_cyclotron()
+
+    # First light: the cyclotron's first frame if the pack is on, else dark
+    stick_pixels.fill(OFF)
+    if machine.state == State.LOOP_IDLE:
+        ring_pixels[WHOLE_STRAND] = cyclotron_frames.frame(cyclotron_cursor_on)
+    else:
+        ring_pixels.fill(OFF)
+    ring_pixels.show()
+    stick_pixels.show()
+    boot.mark('first_pixel')
+
+    # Initialize audio and startup noise
+    #   One MP3 decoder is shared by every sound, plus any WAVs preloaded into
+    #   RAM.  Only the startup sound is loaded now; the rest load later.
+    audio = audiopwmio.PWMAudioOut(settings.audio_out_pin)
+    sound_bank = SoundBank(audio, settings.sounds, settings.sound_preload, load=False,
+                           buffer_size=settings.audio_buffer_bytes)
+    sound_startup = sound_bank.get('startup')
+    sound_shutdown = sound_bank.get('shutdown')
+    sound_firing = sound_bank.get('firing')
+    if machine.state == State.LOOP_IDLE:
+        sound_bank.play(sound_startup)
+    boot.mark('startup_sound')
+
+    # The firing flash plays a fixed pseudo-random sequence at a set rate
+    flash_pattern = FlashPattern(len(color_list))
+    flash_fps: int = settings.firing_flash_fps
+    flash_start: int = 0
+    flash_color = None  # last color filled, so unchanged steps skip the commit
+
     # Initialize power meter counters
-    power_meter_speed: int = constants['power_meter_speed']
-    next_power_meter_clock: int = 0
     power_meter_max: int = 1
     power_meter_max_previous: int = 0
     power_meter_cursor: int = 1
     power_meter_limit: int = 1
 
-    # Initialize hero switch state
-    hero_switch.update()
-    if hero_switch.value:
-        current_state = State.LOOP_IDLE
-    else:
-        current_state = State.STANDBY
-
-    watch_dog = setup_watch_dog(constants['watch_dog_timeout_secs'])
+    watch_dog = setup_watch_dog(settings.watch_dog_timeout_secs)
 
     # Initialize timers and counters
     start_clock: int = supervisor.ticks_ms()
-    next_stat_clock: int = supervisor.ticks_ms() + constants['stat_clock_time_ms']
+    last_clock: int = start_clock
+    uptime_ms: int = 0
     loop_count: int = 0
-    next_watch_dog_clock: int = 0
+    max_sleep_ms: int = int(settings.sleep_time_secs * 1000)
     rotary_encoder_last_position = None
+    ring_dirty: bool = False
+    stick_dirty: bool = False
+    trigger_timestamp: int = 0
+    trigger_latency_pending: bool = False
+
+    # Floats are heap objects, so precompute every sleep the loop can ask for
+    sleep_secs = tuple(ms / 1000 for ms in range(max_sleep_ms + 1))
+
+    # Events are recorded as numbers in the loop and only formatted on flush
+    event_log = EventLog()
+    stats_loop_count: int = 0
+    stats_uptime_ms: int = 0
+    stats_mem_alloc: int = 0
+    flush_mem_alloc: int = 0
+
+    # Health records in nvm for after a reset; the worst gap between input
+    #   polls is tracked for it
+    crash_log = None
+    if settings.crash_log_records:
+        crash_log = CrashLog(microcontroller.nvm, settings.crash_log_records, microcontroller.cpu.reset_reason)
+    worst_frame_ms: int = 0
+    crash_log_loop_count: int = 0
+    crash_log_uptime_ms: int = 0
+    crash_log_event = (0, 0)  # the last notable event, kept once the event log wraps past it
+
+    # Optional per-section timing of the loop runtime; when off, each section
+    # costs one bool test.  When on, each mark allocates (see telemetry.py).
+    timing: bool = settings.loop_timing and settings.runtime == 'loop'
+    loop_timer = LoopTimer() if timing else None
+
+    # Loop time lost while a sound decodes, and the animation stride that
+    #   sheds it; frames are loop iterations, so only for the loop runtime
+    audio_load = None
+    if settings.runtime == 'loop':
+        audio_load = AudioLoad(audio, event_log, settings.audio_busy_percent, settings.audio_max_stride)
+
+    # process the stats output
+    def print_stats(now):
+        nonlocal stats_loop_count, stats_uptime_ms, stats_mem_alloc, flush_mem_alloc
+        if timing:
+            loop_timer.mark(telemetry.RENDER)
+        from report import format_time, pretty_print_bytes, print_state  # loaded on first use
+        # Bytes allocated by the loop since the last stats, leaving out the
+        # flushes and this function, plus what was collected meanwhile;
+        # negative if an automatic collection ran
+        allocated, collections, automatic, reclaimed, longest_us = memory.counts()
+        loop_mem_alloc = gc.mem_alloc() - stats_mem_alloc - flush_mem_alloc + reclaimed
+        loops = loop_count - stats_loop_count
+        if loop_mem_alloc >= 0 and loops > 0:
+            alloc_per_loop = f"{loop_mem_alloc / loops:.1f} bytes/loop"
+        else:
+            alloc_per_loop = "? bytes/loop"
+
+        elapsed_time = uptime_ms / 1000  # Convert ms to seconds
+        loops_per_second = loop_count / elapsed_time if elapsed_time > 0 else 0
+        print(
+            f"{format_time(uptime_ms)} {print_state(machine.state)} loop {loop_count:,} at {loops_per_second:.2f} loops/s free={pretty_print_bytes(gc.mem_free())} alloc={alloc_per_loop}")
+        ring_sent, ring_skipped, ring_bytes = ring_pixels.counts()
+        stick_sent, stick_skipped, stick_bytes = stick_pixels.counts()
+        print(f"{format_time(uptime_ms)} frames: ring {ring_sent} sent/{ring_skipped} skipped "
+              f"({pretty_print_bytes(ring_bytes)}), stick {stick_sent} sent/{stick_skipped} skipped "
+              f"({pretty_print_bytes(stick_bytes)})")
+        interval_ms = uptime_ms - stats_uptime_ms
+        print(f"{format_time(uptime_ms)} memory: {allocated * 1000 // interval_ms if interval_ms > 0 else 0} bytes/s "
+              f"allocated, {collections} collections (longest {longest_us / 1000:.1f}ms, "
+              f"{pretty_print_bytes(reclaimed)} reclaimed), {automatic} automatic")
+        if audio_load is not None:
+            # Busy ms per frame and % of the time, playing against silent
+            silent, playing, most_stride = audio_load.counts()
+            silent_ms = silent[1] / silent[0] if silent[0] else 0
+            silent_load = f"{silent_ms:.1f}ms ({silent[1] * 100 // silent[2] if silent[2] else 0}%) silent"
+            if playing[0]:
+                playing_ms = playing[1] / playing[0]
+                print(f"{format_time(uptime_ms)} audio: {playing[0]} frames playing at {playing_ms:.1f}ms busy "
+                      f"({playing[1] * 100 // playing[2] if playing[2] else 0}%, longest {playing[3]}ms) "
+                      f"vs {silent_load}, {(playing_ms - silent_ms) * playing[0]:.0f}ms lost, "
+                      f"stride up to {most_stride}")
+            else:
+                print(f"{format_time(uptime_ms)} audio: no sound, {silent_load}")
+        if timing:
+            print(f"{format_time(uptime_ms)} timing: {loop_timer.report()}")
+            loop_timer.mark(telemetry.LOGGING)
+
+        stats_loop_count = loop_count
+        stats_uptime_ms = uptime_ms
+        flush_mem_alloc = 0
+        stats_mem_alloc = gc.mem_alloc()
+
+    # Write out recorded inputs, away from the rest of the loop
+    def flush_input_trace(now):
+        input_trace.flush()
+
+    # Format and print logged events, away from the rest of the loop
+    def flush_event_log(now):
+        nonlocal flush_mem_alloc
+        if not event_log.count:
+            return
+        if timing:
+            loop_timer.mark(telemetry.RENDER)
+        mem_alloc = gc.mem_alloc()
+        from report import describe_event, format_time  # loaded on first use
+        for event_time, code, arg1, arg2 in event_log.pending():
+            print(f"{format_time(event_time)} {describe_event(code, arg1, arg2, sound_bank)}")
+        if event_log.dropped:
+            print(f"{format_time(uptime_ms)} *** {event_log.dropped} events dropped")
+            event_log.dropped = 0
+        flush_mem_alloc += gc.mem_alloc() - mem_alloc
+        if timing:
+            loop_timer.mark(telemetry.LOGGING)
+
+    # Once the loop is running: load the other sounds and print the startup
+    # information and boot profile that used to hold up the first pixel
+    def diagnostics(now):
+        if timing:
+            loop_timer.mark(telemetry.RENDER)
+        diagnostics_job.enabled = False
+        boot.mark('running')
+        sound_bank.load_all()
+        boot.mark('sounds')
+        import diagnostics  # only needed this once
+        diagnostics.print_diagnostics(settings, base_colors, palette_cached, sound_bank, memory,
+                                      loop_start_free, input_trace, crash_log, boot)
+        if timing:
+            loop_timer.mark(telemetry.LOGGING)
+
+    # Offer the crash log a record, unless a flash write would stall audio or firing
+    def write_crash_log(now):
+        nonlocal worst_frame_ms, crash_log_loop_count, crash_log_uptime_ms, crash_log_event
+        if machine.state == State.POWER_ON or audio.playing:
+            crash_log_job.interval = CRASH_LOG_RETRY_MS
+            return
+        crash_log_job.interval = settings.crash_log_interval_secs * 1000
+        if timing:
+            loop_timer.mark(telemetry.RENDER)
+        elapsed_ms = uptime_ms - crash_log_uptime_ms
+        loops_per_second = (loop_count - crash_log_loop_count) * 1000 // elapsed_ms if elapsed_ms > 0 else 0
+        latest = event_log.latest(ROUTINE_EVENTS)
+        if latest[0]:
+            crash_log_event = latest
+        event_code, event_arg = crash_log_event
+        heap_size = gc.mem_free() + gc.mem_alloc()
+        if crash_log.offer(uptime_ms // 1000, machine.state, loops_per_second, heap_size - memory.peak_in_use(),
+                           worst_frame_ms, event_code, event_arg):
+            # Start the next record's figures; otherwise they run on until one is written
+            worst_frame_ms = 0
+            crash_log_loop_count = loop_count
+            crash_log_uptime_ms = uptime_ms
+        if timing:
+            loop_timer.mark(telemetry.LOGGING)
+
+    # Periodically feed the watch dog
+    def feed_watch_dog(now):
+        if timing:
+            loop_timer.mark(telemetry.RENDER)
+        watch_dog.feed()
+        event_log.record(uptime_ms, eventlog.WATCH_DOG_FED, settings.watch_dog_timeout_secs)
+        if timing:
+            loop_timer.mark(telemetry.WATCH_DOG)
+
+    # Audio calls happen while handling inputs; time them separately
+    def play_sound(sound, edge_timestamp):
+        if timing:
+            loop_timer.mark(telemetry.INPUT)
+        sound_bank.play(sound)
+        event_log.record(uptime_ms, eventlog.SOUND_PLAYED, sound.number,
+                         ticks_diff(supervisor.ticks_ms(), edge_timestamp))
+        if timing:
+            loop_timer.mark(telemetry.AUDIO)
+
+    def stop_sound():
+        if timing:
+            loop_timer.mark(telemetry.INPUT)
+        sound_bank.stop()
+        if timing:
+            loop_timer.mark(telemetry.AUDIO)
+
+    # Spin the cyclotron while idling
+    def cyclotron_spin(now):
+        nonlocal cyclotron_cursor_on, cyclotron_cursor_off, cyclotron_level, ring_dirty
+        # Follow the spin-up or spin-down curves
+        cyclotron_job.interval = cyclotron_period.value(now)
+        level = cyclotron_fade.value(now)
+        if level != cyclotron_level:
+            cyclotron_level = level
+            render_cyclotron()
+
+        # copy the precomputed frame for this cursor position into the ring
+        ring_pixels[WHOLE_STRAND] = cyclotron_frames.frame(cyclotron_cursor_on)
+        ring_dirty = True
+
+        # increment cursors; cursor_off is the dark pixel just behind the trail.
+        #   Steps are stride pixels, so the spin keeps its speed when slowed for audio.
+        cyclotron_cursor_off = (cyclotron_cursor_on - cyclotron_cursor_width) % len(ring_pixels)
+        cyclotron_cursor_on = (cyclotron_cursor_on + cyclotron_job.stride) % len(ring_pixels)
+
+    # Keep spinning in STANDBY until the spin-down fades out, then go dark
+    def cyclotron_spin_down(now):
+        if not cyclotron_fade.active:
+            return
+        cyclotron_spin(now)
+        if not cyclotron_fade.active:
+            ring_pixels.fill(OFF)  # spun down
+
+    # Blink the power meter quietly in STANDBY
+    def power_meter_blink(now):
+        nonlocal power_meter_cursor, stick_dirty
+        power_meter_job.interval = power_meter_rate.value(now)
+        if power_meter_cursor >= 100:
+            stick_pixels[0] = GREEN
+            power_meter_cursor = 1
+        else:
+            stick_pixels[0] = OFF
+            power_meter_cursor += 1
+        stick_dirty = True
+
+    # Trigger active: decrement the power meter!
+    def power_meter_discharge(now):
+        nonlocal power_meter_cursor, stick_dirty
+        power_meter_job.interval = power_meter_drain.value(now)  # drains faster as it overheats
+        if power_meter_cursor > 0:
+            stick_pixels[power_meter_cursor] = OFF
+            stick_pixels[power_meter_max_previous] = GREEN
+            power_meter_cursor -= 1
+            stick_dirty = True
+
+    # Charge the power meter while idling, toward a new random limit each time
+    def power_meter_charge(now):
+        nonlocal power_meter_cursor, power_meter_limit, power_meter_max, power_meter_max_previous
+        nonlocal ring_dirty, stick_dirty
+        power_meter_job.interval = power_meter_rate.value(now)
+        # reset if the cursor is over the max
+        if power_meter_cursor > power_meter_max:
+            # spark when we hit max
+            if sparks_fade:
+                cyclotron_frames.spark(cyclotron_cursor_off)
+            else:
+                ring_pixels[cyclotron_cursor_off] = ON
+                ring_dirty = True
 
-    # main driver loop
-    print("- Starting main driver loop")
-    gc.collect()  # garbage collect right before starting the while loop
-    while True:
-        clock = supervisor.ticks_ms()
-        loop_count += 1
+            # Increment the limit until we reach maximum
+            if power_meter_limit < (len(stick_pixels) - 1):
+                power_meter_limit += 1
+            elif power_meter_limit > (len(stick_pixels) - 1):
+                power_meter_limit = len(stick_pixels) - 1
 
-        # process the stats output
-        if clock > next_stat_clock:
-            elapsed_time = (clock - start_clock) / 1000  # Convert ms to seconds
-            loops_per_second = loop_count / elapsed_time if elapsed_time > 0 else 0
-            print(
-                f"{format_time(clock - start_clock)} {print_state(current_state)} loop {loop_count:,} at {loops_per_second:.2f} loops/s free={pretty_print_bytes(gc.mem_free())}")
-            next_stat_clock = clock + constants['stat_clock_time_ms']
-
-        # check hero_switch
-        hero_switch.update()
-        if hero_switch.fell:
-            current_state = State.STANDBY
-            print(f" - Hero switch fell: current_state={print_state(current_state)}")
-
-            print(f" - Playing {constants['shutdown_mp3_filename']}")
-            audio.stop()
-            audio.play(decoder_shutdown)
-
-            ring_pixels.fill(OFF)
-            stick_pixels.fill(OFF)
+            # Mark the limits and determine the next
+            power_meter_max_previous = clamp(power_meter_max, 0, len(stick_pixels))
+            power_meter_max = random.randrange(0, power_meter_limit)
 
-        elif hero_switch.rose:
-            current_state = State.LOOP_IDLE
-            print(f" - Hero switch rose: current_state={print_state(current_state)}")
+            # Blank the meter and start again
+            power_meter_cursor = 0
+            stick_pixels.fill(OFF)
 
-            cyclotron_speed = constants['cyclotron_starting_speed']
-            power_meter_speed = constants['power_meter_starting_speed']
-            power_meter_limit = 0
-            power_meter_cursor = 1
+        # turn on the appropriate pixels
+        stick_pixels[power_meter_cursor] = BLUE
+        stick_pixels[power_meter_max_previous] = GREEN
+
+        stick_dirty = True
+
+        # Next time, try a little higher.
+        power_meter_cursor = clamp(power_meter_cursor + 1, 0, len(stick_pixels) - 1)
+
+    # Trigger active: flash the cyclotron!
+    #   The step comes from the time since the trigger was pulled, and the
+    #   ring is only refilled and committed when the color changes.
+    def flash_step(now):
+        nonlocal ring_dirty, flash_color
+        code = flash_pattern.code(ticks_diff(now, flash_start), flash_fps)
+        if code == FLASH_OFF:
+            color = OFF
+        elif code == FLASH_COLOR:
+            color = color_list[cyclotron_color_index]
+        elif code == FLASH_WHITE:
+            color = WHITE
+        else:
+            color = color_list[code - FLASH_RANDOM]
+        if color != flash_color:
+            ring_pixels.fill(color)
+            ring_dirty = True
+            flash_color = color
+
+    # Hero switch closed: spin down and fade out, and the meter goes dark now
+    def enter_standby(now):
+        nonlocal stick_dirty, ring_dirty
+        play_sound(sound_shutdown, input_event.timestamp)
+        cyclotron_period.to(now, settings.cyclotron_starting_speed, settings.spin_down_ms, EASE_IN)
+        cyclotron_fade.to(now, 0, settings.spin_down_ms, EASE_IN)
+        if not cyclotron_fade.active:
+            ring_pixels.fill(OFF)  # no spin-down to run, e.g. spin_down_ms=0
+            ring_dirty = True
+        stick_pixels.fill(OFF)
+        stick_dirty = True
+
+    # Hero switch opened: spin up from wherever a spin-down left off
+    def power_up(now):
+        nonlocal power_meter_limit, power_meter_cursor
+        cyclotron_period.to(now, settings.cyclotron_speed, settings.spin_up_ms, EASE_OUT)
+        cyclotron_fade.to(now, CYCLOTRON_LEVELS, settings.spin_up_ms, EASE_IN_OUT)
+        power_meter_rate.jump(settings.power_meter_starting_speed)
+        power_meter_rate.to(now, settings.power_meter_speed, settings.spin_up_ms, EASE_OUT)
+        power_meter_limit = 0
+        power_meter_cursor = 1
+        play_sound(sound_startup, input_event.timestamp)
+
+    # Trigger pulled: flash right away, and time the edge to the first ring commit
+    def enter_power_on(now):
+        nonlocal flash_start, flash_color, trigger_timestamp, trigger_latency_pending
+        play_sound(sound_firing, input_event.timestamp)
+        flash_start = now
+        flash_color = None
+        flash_step(now)
+        power_meter_drain.jump(settings.power_meter_speed * 50)
+        power_meter_drain.to(now, settings.power_meter_speed * 5, settings.overheat_ms, EASE_IN)
+        trigger_timestamp = input_event.timestamp
+        trigger_latency_pending = True
+
+    # Stopped firing, by letting go of the trigger or switching off
+    def exit_power_on(now):
+        nonlocal ring_dirty
+        ring_pixels.fill(OFF)
+        ring_dirty = True
+        stop_sound()
+
+    machine.add(State.LOOP_IDLE, Event.HERO_OFF, State.STANDBY)
+    machine.add(State.POWER_ON, Event.HERO_OFF, State.STANDBY)
+    machine.add(State.STANDBY, Event.HERO_ON, State.LOOP_IDLE, power_up)
+    machine.add(State.LOOP_IDLE, Event.TRIGGER_PULLED, State.POWER_ON)
+    machine.add(State.POWER_ON, Event.TRIGGER_RELEASED, State.LOOP_IDLE)
+    machine.on_enter(State.STANDBY, enter_standby)
+    machine.on_enter(State.POWER_ON, enter_power_on)
+    machine.on_exit(State.POWER_ON, exit_power_on)
+
+    # Key number * 2 + pressed -> state machine event, and each event's log code
+    key_events = (Event.HERO_ON, Event.HERO_OFF, Event.TRIGGER_RELEASED, Event.TRIGGER_PULLED)
+    event_log_codes = (eventlog.HERO_FELL, eventlog.HERO_ROSE, eventlog.TRIGGER_FELL, eventlog.TRIGGER_ROSE)
+
+    # Check the hero switch, trigger and encoder, and change state to match
+    def poll_inputs(now):
+        nonlocal uptime_ms, last_clock, loop_count, worst_frame_ms
+        nonlocal cyclotron_color_index, rotary_encoder_last_position
+        frame_ms = ticks_diff(now, last_clock)
+        if frame_ms > worst_frame_ms:
+            worst_frame_ms = frame_ms
+        uptime_ms += frame_ms
+        last_clock = now
+        loop_count += 1
 
-            print(f" - Playing {constants['startup_mp3_filename']}")
-            audio.stop()
-            audio.play(decoder_startup)
-
-        # Periodically feed the watch dog
-        if clock > next_watch_dog_clock:
-            watch_dog.feed()
-            print(
-                f"{format_time(clock - start_clock)} watchdog fed, next in {(constants['watch_dog_timeout_secs'] * 0.5)} secs")
-
-            next_watch_dog_clock = clock + (constants['watch_dog_timeout_secs'] * 500)
-
-        # check rotary encoder
-        rotary_encoder_button.update()
-        if rotary_encoder_button.rose:  # Handle trigger release
-            ring_pixels.fill(OFF)
-            audio.stop()
-            if current_state == State.POWER_ON:
-                current_state = State.LOOP_IDLE
-            print(f"{format_time(clock - start_clock)} trigger rose, new state is {print_state(current_state)}")
-        elif rotary_encoder_button.fell:  # Handle trigger engage
-            if current_state == State.LOOP_IDLE:
-                print(f" - Playing {constants['firing_mp3_filename']}")
-                audio.stop()
-                audio.play(decoder_firing)
-                current_state = State.POWER_ON
-            print(f"{format_time(clock - start_clock)} trigger fell, new state is {print_state(current_state)}")
+        # Drain the switch and trigger edges queued since the last poll
+        while inputs.next_event():
+            if input_trace is not None:
+                input_trace.record(input_event.timestamp, input_event.key_number, input_event.pressed)
+            event = key_events[input_event.key_number * 2 + input_event.pressed]
+            machine.handle(event, now)
+            event_log.record(uptime_ms, event_log_codes[event], machine.state)
 
         # modify color as rotary encoder is turned
-        rotary_encoder_current_position = rotary_encoder.position
+        rotary_encoder_current_position = inputs.encoder.position
         if rotary_encoder_last_position is None or rotary_encoder_current_position != rotary_encoder_last_position:
             cyclotron_color_index = rotary_encoder_current_position % len(color_list)
-            print(
-                f" - Ring color set to #{cyclotron_color_index} from encoder {rotary_encoder_current_position}")
+            render_cyclotron()
+            if input_trace is not None:
+                input_trace.record(now, inputtrace.ENCODER, rotary_encoder_current_position)
+            event_log.record(uptime_ms, eventlog.COLOR_CHANGED, cyclotron_color_index,
+                             rotary_encoder_current_position)
 
         rotary_encoder_last_position = rotary_encoder_current_position
 
-        # Handle updates by state
-        if current_state == State.STANDBY:
-            # Blink the Power Meter
-            if clock > next_power_meter_clock:
-                # Calculate time of next power meter update
-                next_power_meter_clock = clock + power_meter_speed
-                # Blink quietly in STANDBY
-                if power_meter_cursor >= 100:
-                    stick_pixels[0] = GREEN
-                    power_meter_cursor = 1
-                else:
-                    stick_pixels[0] = OFF
-                    power_meter_cursor += 1
-
-        elif current_state == State.POWER_ON:
-            # Trigger active: flash the cyclotron!
-            flash_random = random.randrange(0, 20)
-            if flash_random < 3:
-                ring_pixels.fill(color_list[cyclotron_color_index])
-            elif flash_random == 4:
-                ring_pixels.fill(WHITE)
-            elif flash_random == 5:
-                ring_pixels.fill(color_list[random.randrange(0, len(color_list))])
-            else:
-                ring_pixels.fill(OFF)
-
-            # Trigger active: decrement the power meter!
-            if clock > next_power_meter_clock:
-                # Calculate time of next power meter update
-                next_power_meter_clock = clock + (power_meter_speed * 50)
-                if power_meter_cursor > 0:
-                    stick_pixels[power_meter_cursor] = OFF
-                    stick_pixels[power_meter_max_previous] = GREEN
-                    power_meter_cursor -= 1
-
-        elif current_state == State.LOOP_IDLE:
-            # Gradually speed up the cyclotron
-            if cyclotron_speed > constants['cyclotron_speed']:
-                cyclotron_speed -= 5
-            elif cyclotron_speed < constants['cyclotron_speed']:
-                cyclotron_speed = constants['cyclotron_speed']
-
-            if clock > next_cyclotron_clock:
-                # Calculate time of next cyclotron update
-                next_cyclotron_clock = clock + cyclotron_speed
-
-                # turn on the appropriate pixels
-                ring_pixels[cyclotron_cursor_on] = color_list[cyclotron_color_index]
-                ring_pixels[cyclotron_cursor_off] = OFF
-
-                # increment cursors
-                cyclotron_cursor_off = clamp((cyclotron_cursor_on - cyclotron_cursor_width) % len(ring_pixels), 0,
-                                             len(ring_pixels) - 1)
-                cyclotron_cursor_on = clamp((cyclotron_cursor_on + 1) % len(ring_pixels), 0, len(ring_pixels) - 1)
-
-            # Update the Power Meter
-            if clock > next_power_meter_clock:
-                # Calculate time of next power meter update
-                next_power_meter_clock = clock + power_meter_speed
-                # reset if the cursor is over the max
-                if power_meter_cursor > power_meter_max:
-                    ring_pixels[cyclotron_cursor_off] = ON  # spark when we hit max
-
-                    # Increment the limit until we reach maximum
-                    if power_meter_limit < (len(stick_pixels) - 1):
-                        power_meter_limit += 1
-                    elif power_meter_limit > (len(stick_pixels) - 1):
-                        power_meter_limit = len(stick_pixels) - 1
-
-                    # Mark the limits and determine the next
-                    power_meter_max_previous = clamp(power_meter_max, 0, len(stick_pixels))
-                    power_meter_max = random.randrange(0, power_meter_limit)
-
-                    # Blank the meter and start again
-                    power_meter_cursor = 0
-                    stick_pixels.fill(OFF)
-
-                # turn on the appropriate pixels
-                stick_pixels[power_meter_cursor] = BLUE
-                stick_pixels[power_meter_max_previous] = GREEN
-
-                # Next time, try a little higher.
-                power_meter_cursor = clamp(power_meter_cursor + 1, 0, len(stick_pixels) - 1)
-        else:
-            # We shouldn't be in this state
-            print(f"*** Switching from {print_state(current_state)} to {print_state(State.STANDBY)}")
-            current_state = State.STANDBY
+    # Collect garbage while there's time before the next job is due
+    def collect_garbage(now, wait_ms):
+        return memory.idle(uptime_ms, wait_ms)
+
+    # Put a setting changed over the serial console into effect in place:
+    #   only what depends on it is rebuilt (palette colors, cyclotron frames,
+    #   a job's interval).  Settings read where they're used need nothing;
+    #   the rest (pins, sounds, ...) return False and wait for a reload.
+    def apply_setting(name, now):
+        nonlocal color_list, WHITE, ON, GREEN, BLUE, cyclotron_cursor_width, flash_fps, flash_color
+        value = getattr(settings, name)
+        if name == 'cyclotron_speed':
+            if machine.state == State.LOOP_IDLE:
+                cyclotron_period.jump(value)
+        elif name == 'power_meter_speed':
+            if machine.state != State.POWER_ON:
+                power_meter_rate.jump(value)
+        elif name == 'neopixel_ring_brightness':
+            ring_palette.set_brightness(value)
+            color_list = ring_palette.colors[:color_count]
+            WHITE = ring_palette.colors[color_count]
+            ON = ring_palette.scale(0xffffff)
+            if sparks_fade:
+                cyclotron_frames.set_spark_color(ON)
+            render_cyclotron()
+            flash_color = None  # the next flash step refills the ring
+        elif name == 'neopixel_stick_brightness':
+            stick_palette.set_brightness(value)
+            GREEN = stick_palette.colors[color_count + 1]
+            BLUE = stick_palette.colors[color_count + 2]
+        elif name == 'neopixel_ring_cursor_size' or name == 'neopixel_ring_cursor_count':
+            cyclotron_cursor_width = settings.neopixel_ring_cursor_size
+            render_cyclotron()
+        elif name == 'comet_tail' or name == 'spark_decay':
+            if sparks_fade:
+                cyclotron_frames.tail = settings.comet_tail
+                cyclotron_frames.spark_decay = settings.spark_decay
+                cyclotron_frames.shape = None  # rebuild the tail
+                render_cyclotron()
+        elif name == 'firing_flash_fps':
+            flash_fps = value
+            flash_job.interval = 1000 // value
+        elif name == 'stat_clock_time_ms':
+            stats_job.interval = value
+        elif name == 'event_log_flush_ms':
+            event_log_job.interval = value
+            if input_trace_job is not None:
+                input_trace_job.interval = value
+        elif name == 'gc_collect_bytes':
+            memory.collect_bytes = value
+        elif name == 'crash_log_interval_secs':
+            if crash_log_job is not None:
+                crash_log_job.interval = value * 1000
+        elif name == 'audio_busy_percent' or name == 'audio_max_stride':
+            if audio_load is not None:
+                audio_load.busy_percent = settings.audio_busy_percent
+                audio_load.max_stride = settings.audio_max_stride
+        elif name not in ('cyclotron_starting_speed', 'power_meter_starting_speed',
+                          'spin_up_ms', 'spin_down_ms', 'overheat_ms'):
+            return False
+        return True
+
+    # Transmit each strand that changed since the last commit, once
+    def commit_pixels():
+        nonlocal ring_dirty, stick_dirty, trigger_latency_pending
+        if ring_dirty:
+            ring_pixels.show()
+            ring_dirty = False
+            if trigger_latency_pending:
+                trigger_latency_pending = False
+                event_log.record(uptime_ms, eventlog.TRIGGER_LATENCY,
+                                 ticks_diff(supervisor.ticks_ms(), trigger_timestamp))
+        if stick_dirty:
+            stick_pixels.show()
+            stick_dirty = False
+
+    # Register the periodic jobs; the loop sleeps until the next one is due
+    scheduler = Scheduler()
+    stats_job = scheduler.add('stats', settings.stat_clock_time_ms, print_stats, start_clock,
+                              delay=settings.stat_clock_time_ms)
+    scheduler.add('watch_dog', settings.watch_dog_timeout_secs * 500, feed_watch_dog, start_clock)
+    # The animation jobs run the step for the current state, if it has one
+    flash_job = scheduler.add('flash', 1000 // flash_fps,
+                              machine.dispatch({State.POWER_ON: flash_step}), start_clock)
+    cyclotron_job = scheduler.add('cyclotron', cyclotron_period.value(start_clock),
+                                  machine.dispatch({State.LOOP_IDLE: cyclotron_spin,
+                                                    State.STANDBY: cyclotron_spin_down}), start_clock)
+    power_meter_job = scheduler.add('power_meter', power_meter_rate.value(start_clock),
+                                    machine.dispatch({State.STANDBY: power_meter_blink,
+                                                      State.POWER_ON: power_meter_discharge,
+                                                      State.LOOP_IDLE: power_meter_charge}), start_clock)
+    event_log_job = scheduler.add('event_log', settings.event_log_flush_ms, flush_event_log, start_clock)
+    console = Console(settings, apply_setting)
+    scheduler.add('console', CONSOLE_POLL_MS, console.poll, start_clock)
+    input_trace_job = None
+    if input_trace is not None:
+        input_trace_job = scheduler.add('input_trace', settings.event_log_flush_ms, flush_input_trace, start_clock)
+    crash_log_job = None
+    if crash_log is not None:
+        crash_log_job = scheduler.add('crash_log', settings.crash_log_interval_secs * 1000, write_crash_log,
+                                      start_clock, delay=CRASH_LOG_FIRST_MS)
+    animation_jobs = (flash_job, cyclotron_job, power_meter_job)  # slowed while a sound needs the time
+    diagnostics_job = scheduler.add('diagnostics', settings.stat_clock_time_ms, diagnostics, start_clock,
+                                    delay=settings.boot_diagnostics_delay_ms)  # runs once
+
+    # Garbage collect right before starting the loop, then in idle time
+    memory = MemoryManager(event_log, settings.gc_collect_bytes, settings.gc_threshold_bytes)
+    loop_start_free: int = gc.mem_free()
+    boot.mark('loop_setup')
+    print("- Starting main driver loop")
+
+    if settings.runtime == 'asyncio':
+        # Each job becomes its own task; see asyncloop.py
+        import asyncio
+        import asyncloop
+        print(" - Running as asyncio tasks")
+        asyncio.run(asyncloop.run(scheduler, poll_inputs, commit_pixels, max_sleep_ms, collect_garbage))
+        return
 
-        # time.sleep(constants['sleep_time_secs'])
+    # main driver loop
+    while True:
+        clock = supervisor.ticks_ms()
+        if timing:
+            loop_timer.begin()
+        if audio_load.begin(clock, uptime_ms):
+            for job in animation_jobs:
+                job.stride = audio_load.stride
+
+        poll_inputs(clock)
+        if timing:
+            loop_timer.mark(telemetry.INPUT)
+
+        # Run the flash, cyclotron, power meter, stats, event log and watch dog if they're due
+        scheduler.run_due(clock)
+        if timing:
+            loop_timer.mark(telemetry.RENDER)
+
+        commit_pixels()
+        if timing:
+            loop_timer.mark(telemetry.TRANSMIT)
+
+        # Sleep until the next job is due, but poll inputs at least every
+        # sleep_time_secs; collect garbage first if there's time
+        wait_ms = scheduler.ms_until_next(supervisor.ticks_ms(), max_sleep_ms)
+        if collect_garbage(clock, wait_ms):
+            wait_ms = scheduler.ms_until_next(supervisor.ticks_ms(), max_sleep_ms)
+        if timing:
+            loop_timer.mark(telemetry.GC)
+        audio_load.sleeping(wait_ms)
+        time.sleep(sleep_secs[wait_ms])
+        if timing:
+            loop_timer.mark(telemetry.SLEEP)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Text for the serial console: times, sizes, states, logged events and
+# crash log records.
+#
+# Only the stats and the event log flush need these, a few times a second
+# at most, so main_loop() imports this module the first time one of them
+# runs instead of at boot.  crashdump.py uses it on a computer.
+import crashlog
+import eventlog
+from state import STATE_COUNT, STATE_NAMES, State
+
+
+def format_time(milliseconds):
+    seconds = milliseconds // 1000
+    milliseconds = milliseconds % 1000
+    tenths_of_seconds = milliseconds // 100  # Get the first digit of the milliseconds to represent tenths of a second
+
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    seconds = seconds % 60
+
+    return f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}.{int(tenths_of_seconds)}"
+
+
+def pretty_print_bytes(size):
+    # Define unit thresholds and labels
+    units = ["bytes", "KB", "MB", "GB"]
+    step = 1024
+
+    # Find the largest unit to express the size in full units
+    for unit in units:
+        if size < step:
+            return f"{size:.2f} {unit}"
+        size /= step
+
+    # If size is large, it will be formatted in GB from the loop
+    return f"{size:.2f} GB"
+
+
+def print_state(state):
+    if 0 < state < STATE_COUNT:
+        return STATE_NAMES[state]
+    return f"? ({state})"
+
+
+def describe_event(code, arg1, arg2, sound_bank):
+    if code == eventlog.HERO_FELL:
+        return f"hero switch fell, new state is {print_state(arg1)}"
+    elif code == eventlog.HERO_ROSE:
+        return f"hero switch rose, new state is {print_state(arg1)}"
+    elif code == eventlog.TRIGGER_FELL:
+        return f"trigger fell, new state is {print_state(arg1)}"
+    elif code == eventlog.TRIGGER_ROSE:
+        return f"trigger rose, new state is {print_state(arg1)}"
+    elif code == eventlog.COLOR_CHANGED:
+        return f"ring color set to #{arg1} from encoder {arg2}"
+    elif code == eventlog.SOUND_PLAYED:
+        sound = sound_bank.numbered[arg1]
+        return f"playing {sound.name} ({sound.filename}), {arg2}ms after the input edge"
+    elif code == eventlog.WATCH_DOG_FED:
+        return f"watchdog fed, next in {arg1 * 0.5} secs"
+    elif code == eventlog.TRIGGER_LATENCY:
+        return f"trigger to first flash took {arg1}ms"
+    elif code == eventlog.GC_COLLECTED:
+        return f"collected {pretty_print_bytes(arg2)} in {arg1 / 1000:.1f}ms"
+    elif code == eventlog.GC_AUTOMATIC:
+        return f"*** automatic collection reclaimed {pretty_print_bytes(arg1)}"
+    elif code == eventlog.AUDIO_STRIDE:
+        if arg1 == 1:
+            return f"animations back to full rate, loop busy {arg2}%"
+        return f"animations at 1/{arg1} rate while the sound plays, loop busy {arg2}%"
+    elif code == eventlog.BAD_STATE:
+        return f"*** switching from {print_state(arg1)} to {print_state(State.STANDBY)}"
+    else:
+        return f"? event {code} ({arg1}, {arg2})"
+
+
+def event_name(code):
+    # eventlog.TRIGGER_FELL -> 'TRIGGER_FELL'
+    for name in dir(eventlog):
+        if name.isupper() and not name.startswith('_') and getattr(eventlog, name) == code:
+            return name
+    return f"? ({code})"
+
+
+def describe_crash_record(record):
+    seq, boot, uptime_s, state, reset_reason, loops_per_s, min_free, worst_frame_ms, event_code, event_arg = record
+    stalled = "*** " if worst_frame_ms >= crashlog.STALL_MS else ""
+    last_event = f"{event_name(event_code)} ({event_arg})" if event_code else "none"
+    return (f"#{seq} boot {boot} at {format_time(uptime_s * 1000)}: {print_state(state)}, {loops_per_s} loops/s, "
+            f"{pretty_print_bytes(min_free)} min free, {stalled}worst poll gap {worst_frame_ms}ms, "
+            f"last event {last_event}")
+
+
+def reset_reason_name(code):
+    return crashlog.RESET_REASONS[code] if code < len(crashlog.RESET_REASONS) else f"? ({code})"
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# Deadline-driven timer queue for the main loop.
+#
+# Periodic jobs register an interval and a callback.  Each loop iteration
+# runs only the jobs that are due, then asks how long it may sleep before
+# the next deadline.  supervisor.ticks_ms() wraps at 2**29, so deadlines
+# are compared with adafruit_ticks.ticks_diff() rather than ">".
+
+from adafruit_ticks import ticks_add, ticks_diff
+
+
+class Job:
+    def __init__(self, name, interval, callback, deadline):
+        self.name = name
+        self.interval: int = interval  # ms, may be changed by the callback
+        self.callback = callback  # called as callback(now)
+        self.deadline: int = deadline
+        self.enabled: bool = True
+        self.stride: int = 1  # run every stride-th interval, to shed load
+
+    def advance(self, now):
+        # Keep a steady cadence, but don't try to catch up on missed ticks
+        period = self.interval * self.stride
+        self.deadline = ticks_add(self.deadline, period)
+        if ticks_diff(self.deadline, now) <= 0:
+            self.deadline = ticks_add(now, period)
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = []
+
+    def add(self, name, interval, callback, now, delay=0):
+        job = Job(name, interval, callback, ticks_add(now, delay))
+        self.jobs.append(job)
+        return job
+
+    def run_due(self, now):
+        for job in self.jobs:
+            if job.enabled and ticks_diff(now, job.deadline) >= 0:
+                job.callback(now)
+                job.advance(now)
+
+    def ms_until_next(self, now, limit):
+        # How long the loop may sleep, capped at limit so inputs stay responsive
+        wait = limit
+        for job in self.jobs:
+            if job.enabled:
+                remaining = ticks_diff(job.deadline, now)
+                if remaining < wait:
+                    wait = remaining
+        return wait if wait > 0 else 0
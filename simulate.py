@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# Run protonpack.main_loop() headless on a development machine.
+#
+# The CircuitPython modules are replaced by the stand-ins in host/, which
+# share a virtual clock (see host/hostsim.py).  The clock only moves when
+# the loop does modeled work (a fixed cost per iteration plus NeoPixel wire
+# time) or sleeps, so runs are repeatable.  Each time.sleep() at the end
+# of a loop iteration marks one loop.  Inputs are driven from a script
+# of "<time_ms> <pin> <value>" lines; encoder positions are set on the
+# encoder's clock pin, and "<time_ms> serial <text>" types a line into the
+# serial console.  Inputs can also be replayed from an input trace
+# recorded on the pack (see inputtrace.py).  --nvm keeps
+# microcontroller.nvm in a file from one run to the next, like the pack's
+# flash across resets, and --reset-reason says how the last run ended.
+#
+# random is seeded, so a run is deterministic: --pixel-log writes every
+# transmitted frame with its virtual time, and two versions replaying the
+# same trace are visually equivalent when their pixel logs match.  Host
+# time per loop is reported alongside, to compare their cost.
+#
+#   python3 simulate.py --duration 20000 --script my_session.txt --alloc
+#   python3 simulate.py --trace session.trace --pixel-log frames.txt
+#   python3 simulate.py --nvm nvm.bin --reset-reason WATCHDOG
+import argparse
+import contextlib
+import io
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST_DIR = os.path.join(REPO_DIR, 'host')
+sys.path.insert(0, HOST_DIR)
+if REPO_DIR not in sys.path:
+    sys.path.insert(1, REPO_DIR)
+
+import config  # noqa: E402
+import hostsim  # noqa: E402
+import inputtrace  # noqa: E402
+import mpgc  # noqa: E402
+import mptime  # noqa: E402
+
+
+def load_settings(path):
+    # {key: text} as the pack reads settings.toml; a missing file means all defaults
+    return config.read_settings_file(path)
+
+
+def default_script(settings):
+    # Idle, fire for two seconds, turn the encoder, then cycle the hero switch
+    hero = settings.get('hero_switch_pin', 'GP9')
+    trigger = settings.get('rotary_encoder_button_pin', 'GP10')
+    encoder = settings.get('rotary_encoder_clock_pin', 'GP12')
+    return [
+        (4000, trigger, 0),
+        (6000, trigger, 1),
+        (7000, encoder, 1),
+        (8000, hero, 0),
+        (9000, hero, 1),
+    ]
+
+
+def read_script(path):
+    events = []
+    with open(path) as script_file:
+        for line in script_file:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                time_ms, name, value = line.split(None, 2)
+                events.append((int(time_ms), name, value if name == hostsim.SERIAL else int(value)))
+    return events
+
+
+def trace_script(path, settings):
+    # Input changes from a recorded trace.  Records at 0ms are the starting
+    # positions, which are in place before boot; the rest are lined up with
+    # the recording's boot.  Switches read low when closed.
+    boot_ms, records = inputtrace.read_trace(path)
+    pins = {
+        inputtrace.HERO_SWITCH: settings.get('hero_switch_pin', 'GP9'),
+        inputtrace.TRIGGER: settings.get('rotary_encoder_button_pin', 'GP10'),
+        inputtrace.ENCODER: settings.get('rotary_encoder_clock_pin', 'GP12'),
+    }
+    events = []
+    for time_ms, kind, value in records:
+        if kind != inputtrace.ENCODER:
+            value = 0 if value else 1
+        events.append((boot_ms + time_ms if time_ms else 0, pins[kind], value))
+    return events
+
+
+class PixelLog:
+    # One "<virtual us> <pin> <frame hex>" line per transmit
+    def __init__(self, path):
+        self.file = open(path, 'w')
+        self.frames = 0
+
+    def show(self, strand):
+        self.file.write(f"{hostsim.clock_us} {strand.pin!r} {strand.last_frame.hex()}\n")
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+
+def stage_drive(settings, drive_dir):
+    # settings.toml (with any --set overrides) and empty stand-ins for the
+    # assets main_loop() opens from CIRCUITPY
+    with open(os.path.join(drive_dir, 'settings.toml'), 'w') as settings_file:
+        for key, value in settings.items():
+            settings_file.write(f'{key}="{value}"\n')
+    filenames = [value for key, value in settings.items() if key.endswith('_filename')]
+    filenames += [entry.split('=', 1)[1].strip() for entry in settings.get('sounds', '').split(',') if '=' in entry]
+    for filename in filenames:
+        asset = os.path.join(drive_dir, str(filename))
+        os.makedirs(os.path.dirname(asset), exist_ok=True)
+        with open(asset, 'wb') as asset_file:
+            if asset.lower().endswith('.wav'):
+                # A tenth of a second of 16-bit mono silence, so WAVs can be preloaded
+                data = bytes(2 * 2205)
+                asset_file.write(struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + len(data), b'WAVE',
+                                             b'fmt ', 16, 1, 1, 22050, 44100, 2, 16, b'data', len(data)))
+                asset_file.write(data)
+
+
+class FrameStats:
+    # Per-iteration accounting, sampled each time main_loop() sleeps
+    def __init__(self, track_allocations):
+        self.track_allocations = track_allocations
+        self.frames = 0
+        self.host_start = None
+        self.host_last = None
+        self.host_max = 0.0
+        self.host_times = []  # seconds per loop
+        self.writes = {}
+        self.shows = {}
+        self.max_shows = {}
+        self.alloc_total = 0
+        self.alloc_max = 0
+        self.alloc_frames = 0
+        self._last_counts = {}
+
+    def frame(self):
+        host_now = time.perf_counter()
+        if self.track_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+        if self.host_last is None:
+            self.host_start = host_now
+        else:
+            self.frames += 1
+            self.host_max = max(self.host_max, host_now - self.host_last)
+            self.host_times.append(host_now - self.host_last)
+            for strand in hostsim.strands:
+                writes, shows = self._last_counts.get(id(strand), (0, 0))
+                key = repr(strand.pin)
+                self.writes[key] = self.writes.get(key, 0) + strand.writes - writes
+                self.shows[key] = self.shows.get(key, 0) + strand.shows - shows
+                self.max_shows[key] = max(self.max_shows.get(key, 0), strand.shows - shows)
+            if self.track_allocations:
+                transient = peak - self._alloc_base
+                self.alloc_total += transient
+                self.alloc_max = max(self.alloc_max, transient)
+                self.alloc_frames += 1
+        for strand in hostsim.strands:
+            self._last_counts[id(strand)] = (strand.writes, strand.shows)
+        self.host_last = host_now
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            self._alloc_base = tracemalloc.get_traced_memory()[0]
+
+    def report(self, outcome):
+        host_elapsed = (self.host_last or 0) - (self.host_start or 0)
+        virtual_elapsed = hostsim.now_ms() / 1000
+        print(f"- {outcome} after {virtual_elapsed:.2f}s virtual / {host_elapsed:.2f}s host")
+        if not self.frames:
+            return
+        print(f"   - {self.frames:,} loops: {self.frames / virtual_elapsed:,.1f} loops/s virtual, "
+              f"{self.frames / host_elapsed:,.1f} loops/s host, "
+              f"slowest {self.host_max * 1000:.3f}ms host")
+        host_times = sorted(self.host_times)
+        print(f"   - host ms/loop: median {host_times[len(host_times) // 2] * 1000:.3f}, "
+              f"p90 {host_times[len(host_times) * 9 // 10] * 1000:.3f}, "
+              f"p99 {host_times[len(host_times) * 99 // 100] * 1000:.3f}")
+        for key in sorted(self.writes):
+            print(f"   - {key}: {self.writes[key] / self.frames:.2f} writes/loop, "
+                  f"{self.shows[key] / self.frames:.2f} shows/loop (max {self.max_shows[key]})")
+        if self.alloc_frames:
+            print(f"   - allocations: {self.alloc_total / self.alloc_frames:,.1f} bytes/loop average, "
+                  f"{self.alloc_max:,} bytes max")
+
+
+def run(args):
+    settings = load_settings(os.path.join(REPO_DIR, 'settings.toml'))
+    for override in args.set:
+        key, value = override.split('=', 1)
+        settings[key] = value
+    random.seed(args.seed)
+    pixel_log_path = os.path.abspath(args.pixel_log) if args.pixel_log else None  # before moving to the drive
+    nvm_path = os.path.abspath(args.nvm) if args.nvm else None
+    import microcontroller
+    microcontroller.cpu.reset_reason = getattr(microcontroller.ResetReason, args.reset_reason)
+    microcontroller.nvm[:] = bytes(len(microcontroller.nvm))
+    if nvm_path is not None and os.path.exists(nvm_path):
+        with open(nvm_path, 'rb') as nvm_file:
+            saved = nvm_file.read(len(microcontroller.nvm))
+        microcontroller.nvm[:len(saved)] = saved
+    hostsim.reset(duration_ms=args.duration, ticks_offset=args.ticks_offset, frame_cost=args.frame_cost_us)
+    hostsim.sound_duration_ms = args.sound_ms
+    hostsim.decode_cost_us = args.decode_cost_us
+    if args.trace:
+        hostsim.set_script(trace_script(args.trace, settings))
+    elif args.script:
+        hostsim.set_script(read_script(args.script))
+    else:
+        hostsim.set_script(default_script(settings))
+
+    stats = FrameStats(args.alloc)
+    with tempfile.TemporaryDirectory(prefix='CIRCUITPY-') as drive_dir:
+        stage_drive(settings, drive_dir)
+        os.chdir(drive_dir)
+
+        sys.modules['gc'] = mpgc
+        sys.modules['time'] = mptime
+        sys.stdin = hostsim.SerialInput()
+        hostsim.frame_hook = stats.frame
+        pixel_log = PixelLog(pixel_log_path) if args.pixel_log else None
+        if pixel_log is not None:
+            hostsim.show_hook = pixel_log.show
+        import protonpack
+
+        if args.alloc:
+            tracemalloc.start()
+        device_output = sys.stdout if args.verbose else io.StringIO()
+        try:
+            with contextlib.redirect_stdout(device_output):
+                protonpack.main_loop()
+        except hostsim.SimulationComplete:
+            outcome = "Completed"
+        except hostsim.WatchDogReset as reset:
+            outcome = f"Watchdog reset ({reset})"
+        finally:
+            if args.alloc:
+                tracemalloc.stop()
+            if pixel_log is not None:
+                pixel_log.close()
+            os.chdir(REPO_DIR)
+            sys.modules['gc'] = sys.modules['_host_gc']
+            sys.modules['time'] = sys.modules['_host_time']
+            sys.stdin = sys.__stdin__
+            if nvm_path is not None:
+                with open(nvm_path, 'wb') as nvm_file:
+                    nvm_file.write(microcontroller.nvm)
+
+    stats.report(outcome)
+    for strand in hostsim.strands:
+        lit = sum(1 for pixel in range(strand.n) if any(strand.last_frame[pixel * strand.bpp:(pixel + 1) * strand.bpp]))
+        print(f"   - {strand.pin!r} last frame: {lit}/{strand.n} pixels lit, "
+              f"{strand.bytes_sent:,} bytes sent")
+    if args.pixel_log:
+        print(f"   - {pixel_log.frames:,} frames logged to {args.pixel_log}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run protonpack headless against host stand-in modules")
+    parser.add_argument('--duration', type=int, default=12000, help="virtual run time in ms")
+    parser.add_argument('--script', help="input script file of '<time_ms> <pin> <value>' lines")
+    parser.add_argument('--trace', help="replay an input trace recorded with input_trace_file")
+    parser.add_argument('--pixel-log', help="write every transmitted frame to this file")
+    parser.add_argument('--frame-cost-us', type=int, default=250,
+                        help="virtual time charged per loop iteration, in addition to pixel transmits")
+    parser.add_argument('--ticks-offset', type=int, default=0,
+                        help="start supervisor.ticks_ms() here, e.g. near 2**29 to test wraparound")
+    parser.add_argument('--sound-ms', type=int, default=2000, help="how long each played sound lasts")
+    parser.add_argument('--nvm', help="load microcontroller.nvm from this file, if it exists, and save it after")
+    parser.add_argument('--reset-reason', default='POWER_ON',
+                        choices=('POWER_ON', 'BROWNOUT', 'SOFTWARE', 'RESET_PIN', 'WATCHDOG', 'UNKNOWN'),
+                        help="microcontroller.cpu.reset_reason for this run")
+    parser.add_argument('--decode-cost-us', type=int, default=1500,
+                        help="virtual time charged per loop iteration while a sound plays, for decoding")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help="override a settings.toml value; may be repeated")
+    parser.add_argument('--seed', type=int, default=0, help="seed for random")
+    parser.add_argument('--alloc', action='store_true', help="measure allocations per loop (slow)")
+    parser.add_argument('--verbose', action='store_true', help="show the device's serial output")
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
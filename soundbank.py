@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Named sounds sharing one audio output.
+#
+# Every MP3 decoder holds its own decode buffers, so the bank keeps a single
+# audiomp3.MP3Decoder and points it at the file of whichever MP3 is played.
+# The files are opened once up front, so swapping costs a seek rather than
+# a directory lookup.  Short WAV effects can instead be preloaded into RAM
+# as an audiocore.RawSample, which starts without touching flash; other WAV
+# files are streamed with audiocore.WaveFile.
+#
+# The sound list comes from the sounds setting (see config.py).
+# Sounds are numbered in that order for the event log.  With load=False
+# nothing is opened up front: a sound loads when first played, or all of
+# them when load_all() is called, so boot doesn't wait on the assets.
+#
+# A buffer_size gives the decoder and streamed WAVs one buffer of that many
+# bytes to share, since only one sound plays at a time.  Bigger buffers read
+# flash less often while a sound plays; 0 leaves the sizing to CircuitPython.
+import array
+import gc
+import struct
+
+import audiocore
+import audiomp3
+
+
+def load_raw_sample(filename):
+    # Read a PCM WAV file (8-bit unsigned or 16-bit signed) into RAM
+    with open(filename, 'rb') as wav_file:
+        riff, _, wave = struct.unpack('<4sI4s', wav_file.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f"{filename} is not a WAV file")
+        channel_count = sample_rate = bits_per_sample = None
+        while True:
+            header = wav_file.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{filename} has no data chunk")
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = wav_file.read(chunk_size + (chunk_size & 1))
+                audio_format, channel_count, sample_rate = struct.unpack('<HHI', fmt[:8])
+                bits_per_sample = struct.unpack('<H', fmt[14:16])[0]
+                if audio_format != 1 or bits_per_sample not in (8, 16):
+                    raise ValueError(f"{filename} must be 8 or 16 bit PCM to preload")
+            elif chunk_id == b'data':
+                if channel_count is None:
+                    raise ValueError(f"{filename} has no fmt chunk before its data")
+                typecode = 'h' if bits_per_sample == 16 else 'B'
+                sample_bytes = bits_per_sample // 8
+                samples = array.array(typecode, bytearray(chunk_size // sample_bytes * sample_bytes))
+                wav_file.readinto(samples)
+                return audiocore.RawSample(samples, channel_count=channel_count, sample_rate=sample_rate)
+            else:
+                wav_file.seek(chunk_size + (chunk_size & 1), 1)
+
+
+class Sound:
+    def __init__(self, number, name, filename):
+        self.number: int = number
+        self.name = name
+        self.filename = filename
+        self.file = None  # open MP3, played through the shared decoder
+        self.sample = None  # RawSample or WaveFile, played as is
+        self.preloaded: bool = False
+        self.loaded: bool = False
+
+
+class SoundBank:
+    def __init__(self, audio, sounds, preload=(), load=True, buffer_size=0):
+        # sounds is a sequence of (name, filename); preload names WAV sounds to hold in RAM
+        self.audio = audio
+        self.preload = preload
+        self.buffer = None
+        self.memory_used: int = 0
+        if buffer_size:
+            self.buffer = bytearray(buffer_size)
+            self.memory_used = buffer_size
+        self.sounds = {}  # by name
+        self.numbered = []  # by number
+        self.decoder = None
+        for name, filename in sounds:
+            sound = Sound(len(self.numbered), name, filename)
+            self.sounds[name] = sound
+            self.numbered.append(sound)
+        if load:
+            self.load_all()
+
+    def load(self, sound):
+        # Free memory is read after a collection on both sides, so garbage
+        #   collected in between isn't counted against the sound
+        gc.collect()
+        mem_free = gc.mem_free()
+        filename = sound.filename
+        if filename.lower().endswith('.wav'):
+            if sound.name in self.preload:
+                sound.sample = load_raw_sample(filename)
+                sound.preloaded = True
+            else:
+                sound.sample = audiocore.WaveFile(open(filename, 'rb'), self.buffer)
+        else:
+            if sound.name in self.preload:
+                print(f"   - {sound.name}: only WAV files can be preloaded, streaming {filename}")
+            sound.file = open(filename, 'rb')
+            if self.decoder is None:
+                self.decoder = audiomp3.MP3Decoder(sound.file, self.buffer)
+        sound.loaded = True
+        gc.collect()
+        self.memory_used += mem_free - gc.mem_free()
+
+    def load_all(self):
+        for sound in self.numbered:
+            if not sound.loaded:
+                self.load(sound)
+
+    def get(self, name):
+        try:
+            return self.sounds[name]
+        except KeyError:
+            raise ValueError(f"Sound {name} is missing from the sounds setting")
+
+    def play(self, sound):
+        audio = self.audio
+        audio.stop()
+        if not sound.loaded:
+            self.load(sound)
+        if sound.file is None:
+            audio.play(sound.sample)
+        else:
+            sound.file.seek(0)
+            self.decoder.file = sound.file
+            audio.play(self.decoder)
+
+    def stop(self):
+        self.audio.stop()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# Pack states and the input events that move between them, shared by the
+# loop, the state machine's tables and the report formatters.  Both are
+# small ints, so they index straight into those tables.
+
+
+# State definitions
+class State:
+    POWER_ON = 1
+    STANDBY = 2
+    LOOP_IDLE = 3
+
+
+STATE_COUNT = 4  # 0 is never a state
+STATE_NAMES = ('?', 'POWER_ON', 'STANDBY', 'LOOP_IDLE')
+
+
+# Events from the hero switch and trigger
+class Event:
+    HERO_OFF = 0  # hero switch closed
+    HERO_ON = 1
+    TRIGGER_PULLED = 2
+    TRIGGER_RELEASED = 3
+
+
+EVENT_COUNT = 4
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Table-driven state machine for the pack.
+#
+# States and events are small ints (see state.py), so every table is a flat
+# list and each lookup is one index, whatever the number of states:
+#   - transitions, by state * event_count + event: (target, action) or None
+#     when the event means nothing in that state
+#   - enter and exit hooks, by state, run when a transition changes state
+#   - per-state step handlers: dispatch() turns {state: handler} into one
+#     job callback that runs the current state's handler, if it has one
+# Handlers, hooks and actions are all called as handler(now).  A new mode
+# is a new state with its own rows, and costs the other states nothing.
+
+
+class StateMachine:
+    def __init__(self, state_count, event_count, state):
+        self.state: int = state
+        self.state_count: int = state_count
+        self.event_count: int = event_count
+        self.transitions = [None] * (state_count * event_count)
+        self.enter = [None] * state_count
+        self.exit = [None] * state_count
+
+    def add(self, state, event, target, action=None):
+        # In state, event moves to target, running action between the old
+        # state's exit hook and the new state's enter hook
+        self.transitions[state * self.event_count + event] = (target, action)
+
+    def on_enter(self, state, hook):
+        self.enter[state] = hook
+
+    def on_exit(self, state, hook):
+        self.exit[state] = hook
+
+    def handle(self, event, now):
+        # Returns True if the event meant something in the current state
+        transition = self.transitions[self.state * self.event_count + event]
+        if transition is None:
+            return False
+        target, action = transition
+        changing = target != self.state
+        if changing and self.exit[self.state] is not None:
+            self.exit[self.state](now)
+        if action is not None:
+            action(now)
+        if changing:
+            self.state = target
+            if self.enter[target] is not None:
+                self.enter[target](now)
+        return True
+
+    def dispatch(self, handlers):
+        # One callback running handlers[state](now) for the current state
+        table = [None] * self.state_count
+        for state, handler in handlers.items():
+            table[state] = handler
+
+        def step(now):
+            handler = table[self.state]
+            if handler is not None:
+                handler(now)
+
+        return step
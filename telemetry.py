@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Per-section loop timing histograms, and a boot-stage profile.
+#
+# The loop calls begin() at the top of each iteration and mark(section)
+# after each phase; the time since the previous mark is charged to that
+# section.  At the next begin() each section's total for the iteration is
+# dropped into a fixed set of buckets, and the start-to-start time of the
+# iterations themselves goes into FRAME to show jitter.  The counts are
+# preallocated arrays, but the clock isn't free: time.monotonic_ns() is
+# past MicroPython's small int range within a second of power-on, so each
+# begin() and mark() allocates a few long ints, tens of bytes per mark.
+# With loop_timing on, the loop allocates that much more per iteration and
+# collects more often, which shows up in the gc section it times.
+# supervisor.ticks_ms() wouldn't allocate, but its 1ms steps are coarser
+# than most sections.  time.monotonic_ns() resolution on the RP2040 is
+# about 30us, so the lowest bucket is coarse by design.
+import array
+import time
+
+# Sections
+INPUT = 0
+RENDER = 1
+AUDIO = 2
+TRANSMIT = 3
+WATCH_DOG = 4
+LOGGING = 5
+SLEEP = 6
+GC = 7
+FRAME = 8  # whole iteration, start to start
+
+SECTION_NAMES = ('input', 'render', 'audio', 'transmit', 'watchdog', 'logging', 'sleep', 'gc', 'frame')
+
+# Upper bound of each bucket in microseconds; one more bucket holds the rest
+BUCKET_LIMITS_US = (32, 64, 125, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+_BUCKETS = len(BUCKET_LIMITS_US) + 1
+
+
+class LoopTimer:
+    def __init__(self):
+        sections = len(SECTION_NAMES)
+        self.counts = array.array('L', [0] * (sections * _BUCKETS))
+        self.samples = array.array('L', [0] * sections)
+        self.max_us = array.array('L', [0] * sections)
+        self.frame_us = array.array('L', [0] * FRAME)
+        self.marked = bytearray(FRAME)  # sections marked this iteration, 0us or not
+        self.frame_start_ns = 0
+        self.last_ns = 0
+
+    def begin(self):
+        now = time.monotonic_ns()
+        if self.frame_start_ns:
+            self.add(FRAME, (now - self.frame_start_ns) // 1000)
+            frame_us = self.frame_us
+            marked = self.marked
+            for section in range(FRAME):
+                if marked[section]:
+                    self.add(section, frame_us[section])
+                    frame_us[section] = 0
+                    marked[section] = 0
+        self.frame_start_ns = self.last_ns = now
+
+    def mark(self, section):
+        now = time.monotonic_ns()
+        self.frame_us[section] += (now - self.last_ns) // 1000
+        self.marked[section] = 1
+        self.last_ns = now
+
+    def add(self, section, duration_us):
+        bucket = 0
+        while bucket < _BUCKETS - 1 and duration_us > BUCKET_LIMITS_US[bucket]:
+            bucket += 1
+        self.counts[section * _BUCKETS + bucket] += 1
+        self.samples[section] += 1
+        if duration_us > self.max_us[section]:
+            self.max_us[section] = duration_us
+
+    def percentile(self, section, fraction):
+        # Upper bound of the bucket holding the given fraction of samples
+        wanted = self.samples[section] * fraction
+        seen = 0
+        base = section * _BUCKETS
+        for bucket in range(_BUCKETS - 1):
+            seen += self.counts[base + bucket]
+            if seen >= wanted:
+                return min(BUCKET_LIMITS_US[bucket], self.max_us[section])
+        return self.max_us[section]
+
+    def report(self):
+        # One line of p50/p99/max per section that saw samples, then start over
+        parts = []
+        for section in range(len(SECTION_NAMES)):
+            if self.samples[section]:
+                parts.append(f"{SECTION_NAMES[section]} p50<={self.percentile(section, 0.5)}"
+                             f" p99<={self.percentile(section, 0.99)} max={self.max_us[section]}")
+        self.reset()
+        return "us | ".join(parts) + "us" if parts else "no samples"
+
+    def reset(self):
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        for section in range(len(SECTION_NAMES)):
+            self.samples[section] = 0
+            self.max_us[section] = 0
+
+
+class BootProfile:
+    # Time spent in each startup stage.
+    #
+    # time.monotonic_ns() counts from power-on and keeps counting through a
+    # soft reload, such as the one saving settings.toml causes, so it can't
+    # tell when this boot began.  Stages are timed from start_ns instead,
+    # taken before protonpack's imports, and the first stage covers those.
+    # Each mark() charges the time since the previous one to the named
+    # stage.
+    def __init__(self, start_ns, first_stage='imports'):
+        self.stages = []
+        self.last_ns = start_ns
+        self.mark(first_stage)
+
+    def mark(self, stage):
+        now = time.monotonic_ns()
+        self.stages.append((stage, now - self.last_ns))
+        self.last_ns = now
+
+    def elapsed_ms(self, stage):
+        # ms from start_ns to the end of the named stage
+        total = 0
+        for name, duration_ns in self.stages:
+            total += duration_ns
+            if name == stage:
+                return total / 1e6
+        return None
+
+    def report(self):
+        total = 0
+        lines = []
+        for stage, duration_ns in self.stages:
+            total += duration_ns
+            lines.append(f"   - {stage:<14} {duration_ns / 1e6:8.1f}ms  (at {total / 1e6:.1f}ms)")
+        return "\n".join(lines)
@@ -0,0 +1,16 @@
+# Unit tests run on the computer, against the stand-ins in host/ for the
+# CircuitPython modules.  host/ goes first on the path, as in simulate.py,
+# so the stand-ins win over Adafruit-Blinka's board, digitalio and neopixel,
+# which the venv gets with the NeoPixel library.  The repository itself
+# goes last: python -m pytest puts it first, where code.py would shadow the
+# standard library's code module that pytest's debugger imports.  Initial
+# conftests load before that happens.
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST_DIR = os.path.join(REPO_DIR, 'host')
+
+sys.path[:] = [path for path in sys.path if os.path.abspath(path or os.curdir) != REPO_DIR]
+sys.path.insert(0, HOST_DIR)
+sys.path.append(REPO_DIR)
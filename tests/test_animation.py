@@ -0,0 +1,50 @@
+from animation import EASE_IN, LINEAR, Ramp
+
+TICKS_PERIOD = 2 ** 29  # supervisor.ticks_ms() wraps here
+
+
+def test_a_ramp_takes_its_duration():
+    ramp = Ramp(0)
+    ramp.to(1000, 100, 200, LINEAR)
+    assert ramp.active
+    assert ramp.value(900) == 0  # sampled before it started
+    assert ramp.value(1000) == 0
+    assert ramp.value(1100) == 50
+    assert ramp.value(1200) == 100
+    assert not ramp.active
+    assert ramp.value(5000) == 100
+
+
+def test_curves_shape_the_middle():
+    ramp = Ramp(0)
+    ramp.to(0, 100, 200, EASE_IN)
+    assert ramp.value(100) == 25
+
+
+def test_a_ramp_carries_on_from_where_it_is():
+    ramp = Ramp(0)
+    ramp.to(0, 100, 200)
+    ramp.to(100, 0, 100)  # turned back halfway
+    assert ramp.value(100) == 50
+    assert ramp.value(150) == 25
+
+
+def test_timing_survives_the_ticks_wrap():
+    ramp = Ramp(0)
+    ramp.to(TICKS_PERIOD - 50, 100, 200)
+    assert ramp.value(50) == 50
+
+
+def test_zero_duration_lands_at_once():
+    ramp = Ramp(32)
+    ramp.to(0, 0, 0)
+    assert not ramp.active
+    assert ramp.value(0) == 0
+
+
+def test_jump_holds_a_value():
+    ramp = Ramp(0)
+    ramp.to(0, 100, 200)
+    ramp.jump(70)
+    assert not ramp.active
+    assert ramp.value(100) == 70
@@ -0,0 +1,51 @@
+import pytest
+
+import config
+
+
+def write_settings(tmp_path, text):
+    path = tmp_path / 'settings.toml'
+    path.write_text(text)
+    return str(path)
+
+
+def test_parse_setting_checks_kind_and_range():
+    assert config.parse_setting('neopixel_ring_brightness', '0.5') == 0.5
+    assert config.parse_setting('loop_timing', '1') is True
+    assert config.parse_setting('runtime', 'asyncio') == 'asyncio'
+    with pytest.raises(ValueError):
+        config.parse_setting('neopixel_ring_brightness', '1.5')
+    with pytest.raises(ValueError):
+        config.parse_setting('runtime', 'threads')
+    with pytest.raises(ValueError):
+        config.parse_setting('no_such_setting', '1')
+
+
+def test_comments_end_outside_quotes_only(tmp_path):
+    path = write_settings(tmp_path, 'color_list="#ff0000,#00ff00"  # two colors\n'
+                                    'neopixel_ring_brightness=0.1 # dim\n')
+    assert config.read_settings_file(path) == {'color_list': '#ff0000,#00ff00', 'neopixel_ring_brightness': '0.1'}
+    assert config.load(path).color_list == (0xff0000, 0x00ff00)
+
+
+def test_load_reports_every_problem(tmp_path):
+    path = write_settings(tmp_path, 'neopixel_ring_size="0"\nruntime="threads"\nbogus="1"\n')
+    with pytest.raises(ValueError) as error:
+        config.load(path)
+    message = str(error.value)
+    assert 'neopixel_ring_size' in message and 'runtime' in message and 'bogus' in message
+
+
+def test_cursor_count_is_checked_against_the_ring(tmp_path):
+    with pytest.raises(ValueError, match="at most the ring's 60 pixels"):
+        config.load(write_settings(tmp_path, 'neopixel_ring_cursor_count="61"\n'))
+    settings = config.load(write_settings(tmp_path, 'neopixel_ring_segments="GP28:30,GP26:30"\n'
+                                                    'neopixel_ring_size="10"\n'
+                                                    'neopixel_ring_cursor_count="60"\n'))
+    assert config.cross_check(settings) == []
+
+
+def test_save_replaces_and_adds_keys(tmp_path):
+    path = write_settings(tmp_path, '# pack\nsleep_time_secs="0.02"\nsleep_time_secs="0.03"\n')
+    config.save({'sleep_time_secs': '0.05', 'loop_timing': '1'}, path)
+    assert open(path).read() == '# pack\nsleep_time_secs="0.05"\nloop_timing="1"\n'
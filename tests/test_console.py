@@ -0,0 +1,50 @@
+import sys
+
+import hostsim
+
+import config
+import console
+from console import Console
+
+
+def default_settings():
+    return config.load('no-such-settings.toml')  # all defaults
+
+
+def typed(monkeypatch, text):
+    monkeypatch.setattr(sys, 'stdin', hostsim.SerialInput())
+    hostsim.serial_input[:] = text.encode()
+
+
+def test_a_command_can_arrive_over_several_polls(monkeypatch, capsys):
+    applied = []
+    settings = default_settings()
+    serial = Console(settings, lambda name, now: applied.append((name, now)) or True)
+    typed(monkeypatch, "set sleep_time")
+    serial.poll(1)
+    typed(monkeypatch, "_secs 0.02\n")
+    serial.poll(2)
+    assert settings.sleep_time_secs == 0.02
+    assert applied == [('sleep_time_secs', 2)]
+    assert serial.changes == {'sleep_time_secs': '0.02'}
+
+
+def test_bad_values_are_refused(monkeypatch, capsys):
+    settings = default_settings()
+    serial = Console(settings, lambda name, now: True)
+    typed(monkeypatch, "set sleep_time_secs 5\n")
+    serial.poll(0)
+    assert settings.sleep_time_secs == 0.01
+    assert "must be at most" in capsys.readouterr().out
+
+
+def test_overlong_lines_are_dropped(monkeypatch, capsys):
+    applied = []
+    serial = Console(default_settings(), lambda name, now: applied.append(name) or True)
+    typed(monkeypatch, "set sleep_time_secs 0.0" + "2" * 1000)
+    serial.poll(0)
+    assert len(serial.line) == console.MAX_LINE
+    typed(monkeypatch, "\nset sleep_time_secs 0.03\n")
+    serial.poll(0)
+    assert applied == ['sleep_time_secs']
+    assert "ignored" in capsys.readouterr().out
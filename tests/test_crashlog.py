@@ -0,0 +1,61 @@
+import pytest
+
+import crashlog
+
+
+def new_log(nvm, capacity=4, reason='microcontroller.ResetReason.POWER_ON'):
+    log = crashlog.CrashLog(nvm, capacity, reason)
+    log.previous()
+    return log
+
+
+def test_records_read_back_oldest_first():
+    nvm = bytearray(1024)
+    log = new_log(nvm)
+    log.offer(60, 1, 400, 90000, 12, 3, 7)
+    log.offer(120, 2, 410, 80000, 15, 4, -1)
+    capacity, records = crashlog.decode(nvm)
+    assert capacity == 4
+    assert [record[0] for record in records] == [1, 2]
+    assert records[1] == (2, 1, 120, 2, 1, 410, 80000, 15, 4, -1)
+
+
+def test_unchanged_records_wait_for_a_heartbeat_or_a_stall():
+    log = new_log(bytearray(1024))
+    assert log.offer(60, 1, 400, 90000, 12, 3, 7)
+    for _ in range(crashlog.HEARTBEAT_INTERVALS - 1):
+        assert not log.offer(60, 1, 400, 90000, 12, 3, 7)
+    assert log.offer(60, 1, 400, 90000, 12, 3, 7)
+    assert log.offer(60, 1, 400, 90000, crashlog.STALL_MS, 3, 7)
+    assert log.offer(60, 2, 400, 90000, 12, 3, 7)
+
+
+def test_the_ring_keeps_the_newest_records():
+    nvm = bytearray(1024)
+    log = new_log(nvm)
+    for state in range(6):
+        log.offer(state, state, 0, 0, 0, 0, 0)
+    assert [record[0] for record in crashlog.decode(nvm)[1]] == [3, 4, 5, 6]
+
+
+def test_the_next_boot_sees_the_last_one():
+    nvm = bytearray(1024)
+    new_log(nvm).offer(60, 1, 400, 90000, 12, 3, 7)
+    log = crashlog.CrashLog(nvm, 4, 'microcontroller.ResetReason.WATCHDOG')
+    previous = log.previous()
+    assert len(previous) == 1 and previous[0][1] == 1
+    log.offer(1, 0, 0, 0, 0, 0, 0)
+    newest = crashlog.decode(nvm)[1][-1]
+    assert newest[:2] == (2, 2)
+    assert crashlog.RESET_REASONS[newest[4]] == 'WATCHDOG'
+
+
+def test_decode_rejects_other_data():
+    with pytest.raises(ValueError):
+        crashlog.decode(bytes(4))
+    with pytest.raises(ValueError):
+        crashlog.decode(bytes(1024))
+    nvm = bytearray(1024)
+    new_log(nvm)
+    with pytest.raises(ValueError):
+        crashlog.decode(nvm[:crashlog.HEADER_SIZE + crashlog.RECORD_SIZE])
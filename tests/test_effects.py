@@ -0,0 +1,58 @@
+from effects import FLASH_COLOR, FLASH_OFF, FLASH_RANDOM, FLASH_WHITE, CyclotronFrames, FlashPattern
+
+
+def lit_pixels(frame, bpp=3):
+    return [pixel for pixel in range(len(frame) // bpp) if any(frame[pixel * bpp:(pixel + 1) * bpp])]
+
+
+def test_a_cursor_trails_back_from_its_head():
+    frames = CyclotronFrames(6)
+    frames.render(0x010203, 2)
+    assert lit_pixels(frames.frame(0)) == [0, 5]
+    assert lit_pixels(frames.frame(3)) == [2, 3]
+    assert bytes(frames.frame(3)[9:12]) == b'\x01\x02\x03'
+
+
+def test_cursors_are_spread_around_the_ring():
+    frames = CyclotronFrames(6)
+    frames.render(0xff0000, 1, 2)
+    assert lit_pixels(frames.frame(1)) == [1, 4]
+
+
+def test_cursors_wider_than_their_spacing_stop_at_the_next():
+    frames = CyclotronFrames(6)
+    frames.render(0xff0000, 5, 3)
+    assert lit_pixels(frames.frame(0)) == [0, 1, 2, 3, 4, 5]
+
+
+def test_frames_follow_a_new_render_without_new_windows():
+    frames = CyclotronFrames(4, bpp=4)
+    window = frames.frame(2)
+    frames.render(0x000000, 1)
+    assert lit_pixels(window, 4) == []
+    frames.render((1, 2, 3, 4), 1)
+    assert bytes(window[8:12]) == b'\x01\x02\x03\x04'
+    assert frames.frame(2) is window
+
+
+def test_the_flash_pattern_is_the_same_every_boot():
+    assert FlashPattern(7).steps == FlashPattern(7).steps
+
+
+def test_flash_codes_keep_the_old_odds():
+    pattern = FlashPattern(7, length=2000)
+    counts = [pattern.steps.count(code) for code in (FLASH_OFF, FLASH_COLOR, FLASH_WHITE)]
+    colors = len(pattern.steps) - sum(counts)
+    assert 1400 < counts[0] < 1600  # 15 in 20
+    assert 200 < counts[1] < 400  # 3 in 20
+    assert 50 < counts[2] < 150  # 1 in 20
+    assert 50 < colors < 150
+    assert max(pattern.steps) < FLASH_RANDOM + 7
+
+
+def test_flash_steps_follow_elapsed_time():
+    pattern = FlashPattern(7)
+    assert pattern.code(0, 30) == pattern.steps[0]
+    assert pattern.code(33, 30) == pattern.steps[0]
+    assert pattern.code(34, 30) == pattern.steps[1]
+    assert pattern.code(64 * 1000 // 30 + 34, 30) == pattern.steps[1]  # the pattern repeats
@@ -0,0 +1,32 @@
+import eventlog
+from eventlog import EventLog
+
+
+def test_pending_is_oldest_first_and_empties_the_log():
+    log = EventLog(capacity=4)
+    log.record(10, eventlog.HERO_FELL)
+    log.record(20, eventlog.COLOR_CHANGED, 3, 7)
+    assert list(log.pending()) == [(10, eventlog.HERO_FELL, 0, 0), (20, eventlog.COLOR_CHANGED, 3, 7)]
+    assert list(log.pending()) == []
+    assert log.dropped == 0
+
+
+def test_a_full_log_drops_the_oldest():
+    log = EventLog(capacity=4)
+    for now in range(6):
+        log.record(now, eventlog.WATCH_DOG_FED, now)
+    assert log.dropped == 2
+    assert [record[0] for record in log.pending()] == [2, 3, 4, 5]
+    log.record(6, eventlog.HERO_ROSE)
+    assert list(log.pending()) == [(6, eventlog.HERO_ROSE, 0, 0)]
+    assert log.dropped == 2
+
+
+def test_latest_skips_routine_events_even_once_flushed():
+    log = EventLog(capacity=4)
+    assert log.latest() == (0, 0)
+    log.record(1, eventlog.SOUND_PLAYED, 2, 5)
+    log.record(2, eventlog.WATCH_DOG_FED, 7)
+    list(log.pending())
+    assert log.latest() == (eventlog.WATCH_DOG_FED, 7)
+    assert log.latest(skip=(eventlog.WATCH_DOG_FED,)) == (eventlog.SOUND_PLAYED, 2)
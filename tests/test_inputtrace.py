@@ -0,0 +1,29 @@
+import pytest
+
+import inputtrace
+
+
+def test_records_read_back(tmp_path):
+    path = str(tmp_path / 'inputs.trace')
+    recorder = inputtrace.TraceRecorder(path, 1000, 50, capacity=2)
+    recorder.record(1000, inputtrace.HERO_SWITCH, 1)
+    recorder.record(1250, inputtrace.TRIGGER, 1)
+    recorder.record(1300, inputtrace.ENCODER, -3)  # past capacity, so flushed first
+    recorder.close()
+    assert inputtrace.read_trace(path) == (50, [(0, inputtrace.HERO_SWITCH, 1), (250, inputtrace.TRIGGER, 1),
+                                                (300, inputtrace.ENCODER, -3)])
+
+
+def test_times_survive_the_ticks_wrap(tmp_path):
+    path = str(tmp_path / 'inputs.trace')
+    recorder = inputtrace.TraceRecorder(path, 2 ** 29 - 10, 0)
+    recorder.record(5, inputtrace.TRIGGER, 0)
+    recorder.close()
+    assert inputtrace.read_trace(path)[1] == [(15, inputtrace.TRIGGER, 0)]
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'inputs.trace'
+    path.write_bytes(b'PPCL\x01\x00\x00\x00\x00')
+    with pytest.raises(ValueError):
+        inputtrace.read_trace(str(path))
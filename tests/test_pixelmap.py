@@ -0,0 +1,39 @@
+import board
+import neopixel
+
+from pixelmap import Segment, _reorder_table, map_strands
+
+
+def test_reorder_table_matches_orders():
+    assert list(_reorder_table(1, 3, 'GRB', 'GRB')) == [0, 1, 2]
+    assert list(_reorder_table(2, 3, 'RGB', 'GRB')) == [1, 0, 2, 4, 3, 5]
+    # a white channel the logical strand doesn't have stays dark
+    assert list(_reorder_table(1, 3, 'GRBW', 'GRBW')) == [0, 1, 2, -1]
+
+
+def test_reversed_segments_land_backwards():
+    ring, = map_strands(neopixel, [[Segment(board.GP0, 3), Segment(board.GP0, 3, reverse=True)]], ['GRB'])
+    strand = ring.strands[0]
+    ring[0] = (1, 2, 3)
+    ring[3] = (4, 5, 6)
+    ring[5] = (7, 8, 9)
+    ring.show()
+    assert strand[0] == (1, 2, 3)
+    assert strand[5] == (4, 5, 6)
+    assert strand[3] == (7, 8, 9)
+
+
+def test_a_reversed_segment_at_the_start_of_a_pin():
+    ring, = map_strands(neopixel, [[Segment(board.GP1, 4, reverse=True)]], ['GRB'])
+    ring[0] = (1, 2, 3)
+    ring.show()
+    assert ring.strands[0][3] == (1, 2, 3)
+    assert ring.strands[0][0] == (0, 0, 0)
+
+
+def test_unchanged_frames_are_not_sent():
+    ring, = map_strands(neopixel, [[Segment(board.GP2, 4)]], ['GRB'])
+    ring.fill((1, 2, 3))
+    ring.show()
+    ring.show()
+    assert ring.counts()[:2] == (1, 1)
@@ -0,0 +1,48 @@
+from adafruit_ticks import ticks_add
+
+from scheduler import Scheduler
+
+TICKS_PERIOD = 2 ** 29  # supervisor.ticks_ms() wraps here
+
+
+def test_deadlines_hold_across_the_ticks_wrap():
+    calls = []
+    scheduler = Scheduler()
+    start = TICKS_PERIOD - 5
+    job = scheduler.add('spin', 10, calls.append, start, delay=10)
+    assert job.deadline == 5
+    scheduler.run_due(TICKS_PERIOD - 1)
+    assert calls == []
+    assert scheduler.ms_until_next(TICKS_PERIOD - 1, 100) == 6
+    scheduler.run_due(5)
+    assert calls == [5]
+    assert job.deadline == 15
+    assert scheduler.ms_until_next(5, 100) == 10
+
+
+def test_sleep_is_capped_and_skips_disabled_jobs():
+    scheduler = Scheduler()
+    scheduler.add('slow', 500, lambda now: None, 0, delay=500)
+    fast = scheduler.add('fast', 5, lambda now: None, 0, delay=5)
+    assert scheduler.ms_until_next(0, 100) == 5
+    fast.enabled = False
+    assert scheduler.ms_until_next(0, 100) == 100
+    assert scheduler.ms_until_next(600, 100) == 0  # overdue
+
+
+def test_missed_ticks_are_not_caught_up():
+    calls = []
+    scheduler = Scheduler()
+    job = scheduler.add('spin', 10, calls.append, 0)
+    scheduler.run_due(95)
+    scheduler.run_due(95)
+    assert calls == [95]
+    assert job.deadline == ticks_add(95, 10)
+
+
+def test_stride_stretches_the_interval():
+    scheduler = Scheduler()
+    job = scheduler.add('spin', 10, lambda now: None, 0)
+    job.stride = 3
+    scheduler.run_due(0)
+    assert job.deadline == 30
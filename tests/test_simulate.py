@@ -0,0 +1,25 @@
+# Whole sessions through simulate.py, checked by its last-frame report
+import os
+import subprocess
+import sys
+
+from conftest import REPO_DIR
+
+
+def simulate(tmp_path, script, *settings):
+    script_path = tmp_path / 'session.txt'
+    script_path.write_text(script)
+    command = [sys.executable, os.path.join(REPO_DIR, 'simulate.py'), '--script', str(script_path), '--duration', '8000']
+    for setting in settings:
+        command += ['--set', setting]
+    return subprocess.run(command, cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+
+
+def test_spin_down_goes_dark(tmp_path):
+    output = simulate(tmp_path, "3000 GP9 0\n")
+    assert "board.GP28 last frame: 0/60 pixels lit" in output
+
+
+def test_zero_length_spin_down_goes_dark(tmp_path):
+    output = simulate(tmp_path, "3000 GP9 0\n", 'spin_down_ms=0')
+    assert "board.GP28 last frame: 0/60 pixels lit" in output
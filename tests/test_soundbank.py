@@ -0,0 +1,45 @@
+import struct
+
+import pytest
+
+from soundbank import load_raw_sample
+
+
+def write_wav(path, data, bits=16, channels=1, rate=22050, audio_format=1, extra_chunk=b''):
+    block = channels * bits // 8
+    fmt = struct.pack('<HHIIHH', audio_format, channels, rate, rate * block, block, bits)
+    chunks = b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    if extra_chunk:
+        chunks += b'LIST' + struct.pack('<I', len(extra_chunk)) + extra_chunk + b'\0' * (len(extra_chunk) & 1)
+    chunks += b'data' + struct.pack('<I', len(data)) + data
+    path.write_bytes(b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WAVE' + chunks)
+    return str(path)
+
+
+def test_16_bit_samples_are_read_signed(tmp_path):
+    sample = load_raw_sample(write_wav(tmp_path / 'zap.wav', struct.pack('<3h', 0, -2, 300)))
+    assert list(sample.buffer) == [0, -2, 300]
+    assert sample.buffer.typecode == 'h'
+    assert (sample.channel_count, sample.sample_rate) == (1, 22050)
+
+
+def test_8_bit_stereo_with_a_chunk_to_skip(tmp_path):
+    path = write_wav(tmp_path / 'zap.wav', bytes([128, 0, 255, 7]), bits=8, channels=2, rate=8000,
+                     extra_chunk=b'odd')  # padded to an even length
+    sample = load_raw_sample(path)
+    assert list(sample.buffer) == [128, 0, 255, 7]
+    assert sample.buffer.typecode == 'B'
+    assert (sample.channel_count, sample.sample_rate) == (2, 8000)
+
+
+def test_other_files_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="not a WAV"):
+        path = tmp_path / 'zap.mp3'
+        path.write_bytes(b'ID3' + bytes(20))
+        load_raw_sample(str(path))
+    with pytest.raises(ValueError, match="PCM"):
+        load_raw_sample(write_wav(tmp_path / 'float.wav', bytes(8), bits=32, audio_format=3))
+    with pytest.raises(ValueError, match="no data"):
+        path = tmp_path / 'empty.wav'
+        path.write_bytes(b'RIFF' + struct.pack('<I', 4) + b'WAVE')
+        load_raw_sample(str(path))
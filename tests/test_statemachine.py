@@ -0,0 +1,43 @@
+from statemachine import StateMachine
+
+IDLE, RUNNING = 0, 1
+START, STOP, TICK = 0, 1, 2
+
+
+def test_transitions_run_hooks_in_order():
+    calls = []
+    machine = StateMachine(2, 3, IDLE)
+    machine.add(IDLE, START, RUNNING, lambda now: calls.append(('action', now)))
+    machine.on_exit(IDLE, lambda now: calls.append(('exit idle', now)))
+    machine.on_enter(RUNNING, lambda now: calls.append(('enter running', now)))
+    assert machine.handle(START, 5)
+    assert machine.state == RUNNING
+    assert calls == [('exit idle', 5), ('action', 5), ('enter running', 5)]
+
+
+def test_unknown_events_are_ignored():
+    machine = StateMachine(2, 3, IDLE)
+    machine.add(RUNNING, STOP, IDLE)
+    assert not machine.handle(STOP, 0)
+    assert machine.state == IDLE
+
+
+def test_staying_put_runs_only_the_action():
+    calls = []
+    machine = StateMachine(2, 3, RUNNING)
+    machine.add(RUNNING, TICK, RUNNING, lambda now: calls.append('action'))
+    machine.on_exit(RUNNING, lambda now: calls.append('exit'))
+    machine.on_enter(RUNNING, lambda now: calls.append('enter'))
+    assert machine.handle(TICK, 0)
+    assert calls == ['action']
+
+
+def test_dispatch_follows_the_state():
+    calls = []
+    machine = StateMachine(2, 3, IDLE)
+    machine.add(IDLE, START, RUNNING)
+    step = machine.dispatch({RUNNING: lambda now: calls.append(now)})
+    step(1)
+    machine.handle(START, 2)
+    step(3)
+    assert calls == [3]